@@ -1,57 +1,142 @@
 # activities/accounts.py
 import uuid
+import time
 import datetime
-import requests
+import json
+from typing import Callable, Optional
 from app.settings import settings
+from app.utils.http_client import get_data_api_client
+from app.utils import metrics
+from app.activities import ledger
 
 
-def insert_member_accounts(email: str, company_id: str) -> dict:
+APPLICATIONS = ("HEALTHCARE_PORTAL", "HEALTHCARE_MOBILE")
+
+
+def _new_account_id() -> str:
     # generate cuid-like IDs
-    portal_account_id = "cm" + uuid.uuid4().hex[:22]
-    mobile_account_id = "cm" + uuid.uuid4().hex[:22]
-    now = datetime.datetime.utcnow().isoformat()
+    return "cm" + uuid.uuid4().hex[:22]
 
-    accounts = [
-        {
-            "operation": "insert",
-            "table": "accounts",
-            "fields": {
-                "id": None,
-                "email": email,
-                "status": "INVITED",
-                "user_id": portal_account_id,
-                "company_id": company_id,
-                "created_at": now,
-                "updated_at": now,
-                "application": "HEALTHCARE_PORTAL"
-            }
-        },
-        {
-            "operation": "insert",
-            "table": "accounts",
-            "fields": {
-                "id": None,
-                "email": email,
-                "status": "INVITED",
-                "user_id": mobile_account_id,
-                "company_id": company_id,
-                "created_at": now,
-                "updated_at": now,
-                "application": "HEALTHCARE_MOBILE"
-            }
-        },
-    ]
-
-    results = []
-    for acc in accounts:
-        resp = requests.post(
-            f"{settings.DATA_API_BASE_URL}/crud",
+
+def _account_fields(email: str, company_id: str, user_id: str, application: str, now: str) -> dict:
+    return {
+        "id": None,
+        "email": email,
+        "status": "INVITED",
+        "user_id": user_id,
+        "company_id": company_id,
+        "created_at": now,
+        "updated_at": now,
+        "application": application,
+    }
+
+
+def _crud(body: dict) -> dict:
+    started = time.monotonic()
+    status = "error"
+    try:
+        resp = get_data_api_client().post(
+            "/crud",
+            body,
             params={"db": settings.DATA_API_ACCOUNTS_DB_KEY},  # 👈 use the new DB key
-            headers={"Authorization": f"Bearer {settings.AUTH_STATIC_BEARER_TOKEN}"},
-            json=acc,
             timeout=120,
         )
+        status = str(resp.status_code)
         resp.raise_for_status()
-        results.append(resp.json())
+        return resp.json()
+    finally:
+        metrics.record_data_api_request(body["operation"], body["table"], status, time.monotonic() - started)
+
+
+def _insert_rows(rows: list[dict]):
+    # multi-row inserts only when the Data API is known to accept them (see settings)
+    if not settings.ACCOUNTS_MULTI_ROW_INSERTS:
+        for row in rows:
+            _crud({"operation": "insert", "table": "accounts", "fields": row})
+        return
+    chunk_size = max(1, settings.ACCOUNTS_INSERT_CHUNK_SIZE)
+    for start in range(0, len(rows), chunk_size):
+        _crud({
+            "operation": "insert",
+            "table": "accounts",
+            "rows": rows[start:start + chunk_size],
+        })
+
+
+def insert_member_accounts(email: str, company_id: str) -> dict:
+    portal_account_id = _new_account_id()
+    mobile_account_id = _new_account_id()
+    now = datetime.datetime.utcnow().isoformat()
+
+    for user_id, application in zip((portal_account_id, mobile_account_id), APPLICATIONS):
+        _crud({
+            "operation": "insert",
+            "table": "accounts",
+            "fields": _account_fields(email, company_id, user_id, application, now),
+        })
 
     return {"portal_id": portal_account_id, "mobile_id": mobile_account_id}
+
+
+def insert_member_accounts_bulk(members: list[tuple[str, str]], batch_id: Optional[str] = None, phase: Optional[str] = None,
+                                heartbeat: Optional[Callable[[], None]] = None) -> dict[str, dict]:
+    """
+    Insert portal + mobile accounts for many (email, company_id) pairs.
+    Rows go out one per /crud insert, or as multi-row inserts of
+    ACCOUNTS_INSERT_CHUNK_SIZE rows with ACCOUNTS_MULTI_ROW_INSERTS.
+    Returns {email: {"portal_id": ..., "mobile_id": ...}}.
+
+    With a batch_id, members the send ledger already provisioned for
+    (batch_id, phase) get their recorded ids back instead of new accounts;
+    members are recorded chunk by chunk as their inserts succeed.
+    `heartbeat` is called after every /crud insert.
+    """
+    now = datetime.datetime.utcnow().isoformat()
+    ids: dict[str, dict] = {}
+    # members whose portal row went in on an earlier attempt but not their mobile row
+    partial: dict[str, dict] = {}
+    if batch_id:
+        done = ledger.lookup(batch_id, phase, "accounts", (email for email, _ in members))
+        for email, (status, detail) in done.items():
+            (ids if status == "provisioned" else partial)[email] = json.loads(detail)
+    pending: dict[str, str] = {}
+    for email, company_id in members:
+        if email not in ids:
+            pending.setdefault(email, company_id)
+
+    def record(emails: list[str], status: str):
+        if batch_id:
+            ledger.record(batch_id, phase, "accounts", [(email, status, json.dumps(ids[email])) for email in emails])
+
+    def member_rows(email: str, company_id: str) -> list[dict]:
+        ids[email] = partial.get(email) or {"portal_id": _new_account_id(), "mobile_id": _new_account_id()}
+        return [
+            _account_fields(email, company_id, user_id, application, now)
+            for user_id, application in zip((ids[email]["portal_id"], ids[email]["mobile_id"]), APPLICATIONS)
+            if not (email in partial and application == APPLICATIONS[0])
+        ]
+
+    # every member is recorded as soon as its rows are in, so a retry after a
+    # failed insert re-inserts nothing
+    if not settings.ACCOUNTS_MULTI_ROW_INSERTS:
+        for email, company_id in pending.items():
+            rows = member_rows(email, company_id)
+            for row in rows:
+                _insert_rows([row])
+                if heartbeat:
+                    heartbeat()
+                if row["application"] == APPLICATIONS[0]:
+                    record([email], "portal_only")
+            record([email], "provisioned")
+        return ids
+
+    # multi-row: chunk by member so a member's rows always go in the same insert
+    per_chunk = max(1, settings.ACCOUNTS_INSERT_CHUNK_SIZE // len(APPLICATIONS))
+    pending_members = list(pending.items())
+    for chunk_start in range(0, len(pending_members), per_chunk):
+        chunk = pending_members[chunk_start:chunk_start + per_chunk]
+        _insert_rows([row for email, company_id in chunk for row in member_rows(email, company_id)])
+        if heartbeat:
+            heartbeat()
+        record([email for email, _ in chunk], "provisioned")
+    return ids
@@ -0,0 +1,71 @@
+# app/activities/batch_files.py
+"""
+Batch rows from a local or mounted CSV / Parquet file (e.g. a warehouse
+export), as an alternative to a Google Sheets tab for batches too large for
+the Sheets API. Files are streamed in chunks of BATCH_FILE_CHUNK_ROWS and
+only the requested columns are kept; Parquet reads only those columns from
+disk. Parquet needs the optional pyarrow package.
+"""
+import csv
+import os
+from typing import Dict, Iterator, List, Optional
+from temporalio.exceptions import ApplicationError
+from app.settings import settings
+
+FORMATS = (".csv", ".parquet")
+
+
+def _resolve(path: str) -> str:
+    # relative paths are taken from BATCH_FILES_DIR (the shared mount)
+    return path if os.path.isabs(path) else os.path.join(settings.BATCH_FILES_DIR, path)
+
+
+def iter_file_chunks(path: str, columns: Optional[List[str]] = None, chunk_rows: Optional[int] = None) -> Iterator[List[Dict]]:
+    """
+    Yield lists of up to `chunk_rows` row dicts from a .csv or .parquet file.
+    With `columns`, rows hold only those keys (None when the file lacks one).
+    """
+    path = _resolve(path)
+    chunk_rows = chunk_rows or settings.BATCH_FILE_CHUNK_ROWS
+    extension = os.path.splitext(path)[1].lower()
+    # a missing file or a missing pyarrow stays that way on every retry
+    if not os.path.isfile(path):
+        raise ApplicationError(f"batch file {path!r} not found", non_retryable=True)
+    if extension == ".csv":
+        yield from _iter_csv(path, columns, chunk_rows)
+    elif extension == ".parquet":
+        yield from _iter_parquet(path, columns, chunk_rows)
+    else:
+        raise ApplicationError(f"unsupported batch file {path!r}; expected one of {', '.join(FORMATS)}", non_retryable=True)
+
+
+def _iter_csv(path: str, columns: Optional[List[str]], chunk_rows: int) -> Iterator[List[Dict]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        chunk: List[Dict] = []
+        for row in reader:
+            chunk.append({c: row.get(c) for c in columns} if columns else row)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _iter_parquet(path: str, columns: Optional[List[str]], chunk_rows: int) -> Iterator[List[Dict]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ApplicationError("Parquet batch files require the pyarrow package", non_retryable=True)
+    parquet_file = pq.ParquetFile(path)
+    present = [c for c in columns if c in parquet_file.schema_arrow.names] if columns else None
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=present):
+        rows = batch.to_pylist()
+        if columns:
+            rows = [{c: row.get(c) for c in columns} for row in rows]
+        yield rows
+
+
+def read_file_rows(path: str, columns: Optional[List[str]] = None) -> List[Dict]:
+    """Return every row of the file as a list of dicts (only `columns`, when given)."""
+    return [row for chunk in iter_file_chunks(path, columns) for row in chunk]
@@ -1,24 +1,70 @@
 # app/activities/data_api.py
-import requests
 from typing import Optional, Dict, Any
+from temporalio.exceptions import ApplicationError
 from app.settings import settings
+from app.utils.http_client import get_data_api_client
+from app.utils import metrics
+import time
 
 
+import logging
 import re
+import threading
+from app.utils.select_cache import SelectCache
 
-def _headers() -> Dict[str, str]:
-    return {"Authorization": f"Bearer {settings.AUTH_STATIC_BEARER_TOKEN}"}
+logger = logging.getLogger(__name__)
+
+# Columns kept when a directory table is warmed as a whole (see warm_cache)
+WARM_COLUMNS = {
+    "clients": ["id", "client_name"],
+    "brokers": ["id", "email"],
+    "clients_to_brokers": ["client_id", "broker_id"],
+    "client_contacts": ["client_id", "email"],
+}
+
+_cache: Optional[SelectCache] = None
+_cache_lock = threading.Lock()
+
+
+def _select_cache() -> SelectCache:
+    """Worker-wide cache of directory-table selects, created on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SelectCache(settings.DATA_API_CACHE_TTLS, settings.DATA_API_CACHE_MAX_ROWS)
+    return _cache
 
 
 def _select(table: str, columns: list[str], filters: Dict[str, Any]) -> list[Dict[str, Any]]:
-    url = f"{settings.DATA_API_BASE_URL}/select"
+    cache = _select_cache()
+    rows = cache.get(table, columns, filters)
+    if rows is None:
+        rows = _select_uncached(table, columns, filters)
+        cache.put(table, columns, filters, rows)
+    return rows
+
+
+def warm_cache(tables: Optional[list[str]] = None):
+    """Load whole directory tables into the worker-local cache (default: every cached table)."""
+    cache = _select_cache()
+    for table in tables or [t for t in WARM_COLUMNS if cache.cacheable(t)]:
+        cache.warm(table, WARM_COLUMNS[table], _select_uncached(table, WARM_COLUMNS[table], {}))
+
+
+def _select_uncached(table: str, columns: list[str], filters: Dict[str, Any]) -> list[Dict[str, Any]]:
     params = {"db": settings.DATA_API_DB_KEY}
     body = {"table": table, "columns": columns, "filters": filters}
-    headers = _headers()
 
-    resp = requests.post(url, json=body, params=params, headers=headers, timeout=120)
-    resp.raise_for_status()
-    data = resp.json()
+    started = time.monotonic()
+    status = "error"
+    try:
+        resp = get_data_api_client().post("/select", body, params=params, timeout=120)
+        status = str(resp.status_code)
+        resp.raise_for_status()
+        data = resp.json()
+    finally:
+        metrics.record_data_api_request("select", table, status, time.monotonic() - started)
 
     # handle "result" vs "rows"
     if "rows" in data:
@@ -62,47 +108,47 @@ def get_client_emails_by_id(client_id: int) -> list[str]:
 
 
 
-def get_member_emails_by_client_id(client_id: int) -> list[str]:
-    # 1. Get all members for this client
-    members = _select(
-        table="members",
-        columns=["id", "email"],
-        filters={"client_id": client_id},
-    )
-    if not members:
-        print(f"[DEBUG] No members found for client_id={client_id}")
-        return []
-
-    active_emails: list[str] = []
+def _select_in(
+    table: str,
+    columns: list[str],
+    column: str,
+    values: list[Any],
+    filters: Optional[Dict[str, Any]] = None,
+) -> list[Dict[str, Any]]:
+    """
+    Select rows where `column` is any of `values`.
 
-    # 2. For each member, check if ACTIVE in current_member_status_view
-    for m in members:
-        member_id = m.get("id")
-        email = m.get("email")
-        if not member_id or not email:
-            print(f"[DEBUG] Skipping member with missing id/email: {m}")
-            continue
-
-        status_rows = _select(
-            table="current_member_status_view",
-            columns=["member_status"],
-            filters={"member_id": member_id},
+    Relies on /select treating a list-valued filter as SQL IN (the bulk
+    lookups in this module all depend on it); values are split into chunks
+    of DATA_API_IN_CHUNK_SIZE so very large clients stay well under request
+    size limits. Rows outside the requested values mean the API did not
+    apply the filter that way, and fail the activity without retries
+    rather than returning wrong recipients.
+    """
+    unique_values = list(dict.fromkeys(values))
+    chunk_size = max(1, settings.DATA_API_IN_CHUNK_SIZE)
+    rows: list[Dict[str, Any]] = []
+    for start in range(0, len(unique_values), chunk_size):
+        chunk = unique_values[start:start + chunk_size]
+        chunk_rows = _select(
+            table=table,
+            columns=columns,
+            filters={**(filters or {}), column: chunk},
         )
+        if column in columns:
+            requested = {str(v) for v in chunk}
+            if any(str(r.get(column)) not in requested for r in chunk_rows):
+                raise ApplicationError(
+                    f"/select on {table} returned rows outside the list filter on {column}; "
+                    "the Data API does not apply list-valued filters as IN",
+                    non_retryable=True,
+                )
+        rows.extend(chunk_rows)
+    return rows
 
-        if status_rows:
-            statuses = [r.get("member_status") for r in status_rows]
-            print(f"[DEBUG] Member {member_id}: statuses={statuses}")
-        else:
-            print(f"[DEBUG] Member {member_id}: no status rows found")
-
-        # 3. Only keep ACTIVE members
-        if status_rows and any(r.get("member_status") == "ACTIVE" for r in status_rows):
-            active_emails.append(email)
-            print(f"[DEBUG] Member {member_id} is ACTIVE, added email={email}")
-        else:
-            print(f"[DEBUG] Member {member_id} not ACTIVE, skipped")
 
-    return active_emails
+def get_member_emails_by_client_id(client_id: int) -> list[str]:
+    return get_member_emails_by_client_ids([client_id])[str(client_id)]
 
 
 def get_all_client_ids() -> list[int]:
@@ -114,6 +160,24 @@ def get_all_client_ids() -> list[int]:
     return [int(r["id"]) for r in rows] if rows else []
 
 
+def get_clients_by_ids(client_ids: list[int]) -> Dict[str, Optional[str]]:
+    """
+    Look up only the given clients (chunked IN query on clients.id).
+    Returns {str(client_id): client_name} for the ids that exist.
+    """
+    rows = _select_in(
+        table="clients",
+        columns=["id", "client_name"],
+        column="id",
+        values=client_ids,
+    )
+    # the rows are still reported as "client_id not found in DB"; this only
+    # flags a batch that may be stale (or an API not applying IN filters)
+    if client_ids and not rows:
+        logger.warning("none of %d client ids were found in clients", len(set(client_ids)))
+    return {str(r["id"]): r.get("client_name") for r in rows}
+
+
 def get_client_name_by_id(client_id: int) -> Optional[str]:
     rows = _select(
         table="clients",
@@ -123,4 +187,97 @@ def get_client_name_by_id(client_id: int) -> Optional[str]:
     return rows[0]["client_name"] if rows else None
 
 
+def get_broker_ids_for_clients(client_ids: list[int]) -> Dict[str, list[int]]:
+    """Broker ids per client from clients_to_brokers, keyed by str(client_id)."""
+    rows = _select_in(
+        table="clients_to_brokers",
+        columns=["client_id", "broker_id"],
+        column="client_id",
+        values=client_ids,
+    )
+    mapping: Dict[str, list[int]] = {str(cid): [] for cid in client_ids}
+    for r in rows:
+        mapping.setdefault(str(r["client_id"]), []).append(int(r["broker_id"]))
+    return mapping
+
+
+def get_broker_emails_by_ids(broker_ids: list[int]) -> Dict[str, Optional[str]]:
+    """Broker email per broker, keyed by str(broker_id); missing brokers map to None."""
+    rows = _select_in(
+        table="brokers",
+        columns=["id", "email"],
+        column="id",
+        values=broker_ids,
+    )
+    emails: Dict[str, Optional[str]] = {str(bid): None for bid in broker_ids}
+    for r in rows:
+        emails[str(r["id"])] = r.get("email")
+    return emails
+
+
+def get_client_emails_by_ids(client_ids: list[int]) -> Dict[str, list[str]]:
+    """Non-empty client contact emails per client, keyed by str(client_id)."""
+    rows = _select_in(
+        table="client_contacts",
+        columns=["client_id", "email"],
+        column="client_id",
+        values=client_ids,
+    )
+    contacts: Dict[str, list[str]] = {str(cid): [] for cid in client_ids}
+    for r in rows:
+        if r.get("email"):
+            contacts.setdefault(str(r["client_id"]), []).append(r["email"])
+    return contacts
+
+
+def get_member_emails_by_client_ids(client_ids: list[int]) -> Dict[str, list[str]]:
+    """ACTIVE member emails per client, keyed by str(client_id)."""
+    members = _select_in(
+        table="members",
+        columns=["id", "client_id", "email"],
+        column="client_id",
+        values=client_ids,
+    )
+    members = [m for m in members if m.get("id") and m.get("email")]
+
+    status_rows = _select_in(
+        table="current_member_status_view",
+        columns=["member_id"],
+        column="member_id",
+        values=[m["id"] for m in members],
+        filters={"member_status": "ACTIVE"},
+    )
+    active_ids = {str(r.get("member_id")) for r in status_rows}
+
+    active: Dict[str, list[str]] = {str(cid): [] for cid in client_ids}
+    for m in members:
+        if str(m["id"]) in active_ids:
+            active.setdefault(str(m["client_id"]), []).append(m["email"])
+    return active
+
+
+def get_broker_mapping(client_ids: list[int]) -> Dict[str, Any]:
+    """
+    Client->broker mapping, broker emails and client names for many clients
+    in a handful of IN-filtered queries.
+    """
+    client_brokers = get_broker_ids_for_clients(client_ids)
+    broker_ids = list(dict.fromkeys(bid for bids in client_brokers.values() for bid in bids))
+    return {
+        "client_brokers": client_brokers,
+        "brokers": get_broker_emails_by_ids(broker_ids),
+        "client_names": get_clients_by_ids(client_ids),
+    }
+
 
+def build_roster(client_ids: list[int]) -> Dict[str, Any]:
+    """
+    Resolve every recipient a batch needs in one pass.
+    Keys are str(id) so the roster round-trips through Temporal's JSON
+    payloads unchanged.
+    """
+    return {
+        **get_broker_mapping(client_ids),
+        "client_contacts": get_client_emails_by_ids(client_ids),
+        "members": get_member_emails_by_client_ids(client_ids),
+    }
@@ -1,91 +1,122 @@
+from typing import Optional
 from temporalio import activity
-from app.activities import sheets, data_api, email
-from app.activities.accounts.accounts import insert_member_accounts
+from temporalio.exceptions import ApplicationError
+from app.activities import sheets, batch_files, data_api, email, results
+from app.activities.accounts.accounts import insert_member_accounts, insert_member_accounts_bulk
+from app.settings import settings
+from app.utils.invite_links import generate_invite_tokens
 
+# Activities are plain (sync) functions: they call blocking HTTP clients
+# (requests, gspread, SendGrid), so the worker runs them on a sized
+# thread pool (see worker.py) instead of on its event loop.
 
 
-# --- Sheets ---
+
+# --- Sheets / batch files ---
 @activity.defn
-async def read_rows_activity(tab_name: str):
-    """Read rows from a Google Sheet tab."""
-    return sheets.read_batch_rows(tab_name)
+def read_rows_activity(tab_name: str, columns: Optional[list[str]] = None, source: str = "sheets", source_path: Optional[str] = None):
+    """Read batch rows (only `columns`, when given) from a Google Sheet tab, or a CSV/Parquet file for source="file"."""
+    # a bad source or path fails the same way on every attempt, so do not retry it
+    if source == "file":
+        if not source_path:
+            raise ApplicationError('source "file" needs a source_path', non_retryable=True)
+        return batch_files.read_file_rows(source_path, columns)
+    if source != "sheets":
+        raise ApplicationError(f"unknown batch source: {source}", non_retryable=True)
+    return sheets.read_batch_rows(tab_name, columns)
 
 # --- Members---
 @activity.defn
-async def get_member_emails_activity(client_id: int) -> list[str]:
+def get_member_emails_activity(client_id: int) -> list[str]:
     return data_api.get_member_emails_by_client_id(client_id)
 
 
 
-from temporalio import activity
-from app.activities.accounts.accounts import insert_member_accounts
-
-@activity.defn
-def insert_member_accounts_activity(email: str, company_id: str) -> dict:
-    return insert_member_accounts(email, company_id)
-
-
-
 
 # --- Brokers ---
 @activity.defn
-async def get_broker_ids_for_client_activity(client_id: int):
+def get_broker_ids_for_client_activity(client_id: int):
     """Return list of broker_ids for a given client_id from clients_to_brokers."""
     return data_api.get_broker_ids_for_client(client_id)
 
 
 @activity.defn
-async def get_broker_email_activity(broker_id: int):
+def get_broker_mapping_activity(client_ids: list[int]) -> dict:
+    """Return client->broker ids, broker emails and client names for many clients at once."""
+    return data_api.get_broker_mapping(client_ids)
+
+
+@activity.defn
+def get_broker_email_activity(broker_id: int):
     """Return broker email for a given broker_id from brokers table."""
     return data_api.get_broker_email_by_id(broker_id)
 
 
 # --- Clients ---
 @activity.defn
-async def get_client_emails_activity(client_id: int) -> list[str]:
+def get_client_emails_activity(client_id: int) -> list[str]:
     """Return list of client contact emails from client_contacts table."""
     return data_api.get_client_emails_by_id(client_id)
 
 
 @activity.defn
-async def get_all_client_ids_activity() -> list[int]:
+def get_all_client_ids_activity() -> list[int]:
     return data_api.get_all_client_ids()
 
 
 @activity.defn
-async def get_client_name_activity(client_id: int) -> str:
+def validate_client_ids_activity(client_ids: list[int]) -> dict:
+    """Return {str(client_id): client_name} for the given ids that exist in the clients table."""
+    return data_api.get_clients_by_ids(client_ids)
+
+
+@activity.defn
+def get_client_name_activity(client_id: int) -> str:
     """Return the client_name from the clients table."""
     return data_api.get_client_name_by_id(client_id)
 
 
+# --- Roster ---
+@activity.defn
+def resolve_roster_activity(client_ids: list[int]) -> dict:
+    """Resolve broker mapping and emails, client names, client contacts and ACTIVE members for a batch."""
+    return data_api.build_roster(client_ids)
+
+
+@activity.defn
+def refresh_roster_members_activity(client_ids: list[int]) -> dict:
+    """Re-resolve only the ACTIVE member emails for a batch."""
+    return data_api.get_member_emails_by_client_ids(client_ids)
+
+
 # --- Emails: Brokers ---
 @activity.defn
-async def send_broker_email_type1_activity(to_email: str, dynamic_data: dict):
+def send_broker_email_type1_activity(to_email: str, dynamic_data: dict):
     """Send broker email using template 1."""
     return email.send_broker_email_type1(to_email, dynamic_data)
 
 
 @activity.defn
-async def send_broker_email_type2_activity(to_email: str, dynamic_data: dict):
+def send_broker_email_type2_activity(to_email: str, dynamic_data: dict):
     """Send broker email using template 2."""
     return email.send_broker_email_type2(to_email, dynamic_data)
 
 
 # --- Emails: Clients ---
 @activity.defn
-async def send_client_email_type1_activity(to_email: str, dynamic_data: dict):
+def send_client_email_type1_activity(to_email: str, dynamic_data: dict):
     """Send client email using template 1."""
     return email.send_client_email_type1(to_email, dynamic_data)
 
 
 @activity.defn
-async def send_client_email_type2_activity(to_email: str, dynamic_data: dict):
+def send_client_email_type2_activity(to_email: str, dynamic_data: dict):
     """Send client email using template 2."""
     return email.send_client_email_type2(to_email, dynamic_data)
     
     
 @activity.defn
-async def send_client_email_type3_activity(to_email: str, dynamic_data: dict):
+def send_client_email_type3_activity(to_email: str, dynamic_data: dict):
     """Send client email using template 3."""
     return email.send_client_email_type3(to_email, dynamic_data) 
 
@@ -93,23 +124,65 @@ async def send_client_email_type3_activity(to_email: str, dynamic_data: dict):
 # --- Emails: Members ---
 
 @activity.defn
-async def insert_member_accounts_activity(email: str, company_id: str):
+def insert_member_accounts_activity(email: str, company_id: str):
     """Insert portal + mobile accounts for a member in the accounts table."""
     return insert_member_accounts(email, company_id)
 
 
 @activity.defn
-async def send_member_email_type1_activity(to_email: str, dynamic_data: dict):
+def insert_member_accounts_bulk_activity(members: list[tuple[str, str]], batch_id: Optional[str] = None, phase: Optional[str] = None) -> dict:
+    """Insert portal + mobile accounts for many (email, company_id) pairs, heartbeating per insert."""
+    return insert_member_accounts_bulk(members, batch_id, phase, heartbeat=activity.heartbeat)
+
+
+@activity.defn
+def generate_invite_links_activity(emails: list[str], company_id: str, iat: int, exp: int) -> dict:
+    """Sign invite tokens for a chunk of members; link = base_url + token, tokens in `emails` order."""
+    return {
+        "base_url": f"{settings.INVITE_ORIGIN}/confirm-invitation?token=",
+        "tokens": generate_invite_tokens(
+            emails,
+            company_id,
+            iat,
+            exp,
+            secret_key=settings.INVITE_SECRET_KEY,
+            origin=settings.INVITE_ORIGIN,
+        ),
+    }
+
+
+@activity.defn
+def send_member_email_type1_activity(to_email: str, dynamic_data: dict):
     """Send member email using template 1."""
     return email.send_member_email_type1(to_email, dynamic_data)
 
 
 @activity.defn
-async def send_member_email_type2_activity(to_email: str, dynamic_data: dict):
+def send_member_email_type2_activity(to_email: str, dynamic_data: dict):
     """Send member email using template 2."""
     return email.send_member_email_type2(to_email, dynamic_data)
 
 @activity.defn
-async def send_member_email_type3_activity(to_email: str, dynamic_data: dict):
+def send_member_email_type3_activity(to_email: str, dynamic_data: dict):
     """Send member email using template 3."""
-    return email.send_member_email_type3(to_email, dynamic_data)
\ No newline at end of file
+    return email.send_member_email_type3(to_email, dynamic_data)
+
+
+# --- Emails: Batches ---
+@activity.defn
+def send_email_batch_activity(template: str, recipients: list[dict], batch_id: Optional[str] = None, phase: Optional[str] = None) -> list[dict]:
+    """Send one template to many recipients in a single SendGrid request, skipping ledgered ones."""
+    return email.send_template_batch(template, recipients, batch_id, phase)
+
+
+@activity.defn
+def get_send_rate_activity() -> float:
+    """SendGrid requests/sec this email worker is paced at (<= 0: unthrottled); used by dry runs."""
+    return settings.SENDGRID_MAX_REQUESTS_PER_SEC
+
+
+# --- Results ---
+@activity.defn
+def write_results_activity(results_id: str, part: str, items: list[dict]) -> int:
+    """Write one part of a batch's per-recipient results artifact."""
+    return results.write_results(results_id, part, items)
@@ -1,6 +1,83 @@
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from sendgrid.helpers.mail import Mail, Personalization, To
+from python_http_client.exceptions import HTTPError
+import json
+import re
+import threading
+import time
+from typing import Optional
+from temporalio.exceptions import ApplicationError
 from app.settings import settings
+from app.utils.rate_limit import AdaptiveRateLimiter, seconds_until_reset
+from app.utils import metrics
+from app.utils.http_client import SendGridClient, get_sendgrid_client
+from app.activities import ledger
+
+# SendGrid v3 accepts at most 1,000 personalizations per request
+MAX_PERSONALIZATIONS = 1000
+
+# "field" of a 400 error about one personalization, e.g. "personalizations.3.to.0.email"
+_PERSONALIZATION_FIELD = re.compile(r"personalizations\.(\d+)(\.|$)")
+
+# Batch template keys -> Settings attribute holding the SendGrid template id
+TEMPLATES = {
+    "broker_type1": "SENDGRID_BROKER_TEMPLATE_1",
+    "broker_type2": "SENDGRID_BROKER_TEMPLATE_2",
+    "client_type1": "SENDGRID_CLIENT_TEMPLATE_1",
+    "client_type2": "SENDGRID_CLIENT_TEMPLATE_2",
+    "client_type3": "SENDGRID_CLIENT_TEMPLATE_3",
+    "member_type1": "SENDGRID_MEMBER_TEMPLATE_1",
+    "member_type2": "SENDGRID_MEMBER_TEMPLATE_2",
+    "member_type3": "SENDGRID_MEMBER_TEMPLATE_3",
+}
+
+
+_limiter: Optional[AdaptiveRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def _rate_limiter() -> Optional[AdaptiveRateLimiter]:
+    """Worker-wide SendGrid rate limiter (None when SENDGRID_MAX_REQUESTS_PER_SEC <= 0)."""
+    global _limiter
+    if _limiter is None and settings.SENDGRID_MAX_REQUESTS_PER_SEC > 0:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdaptiveRateLimiter(
+                    max_rate=settings.SENDGRID_MAX_REQUESTS_PER_SEC,
+                    burst=settings.SENDGRID_RATE_BURST,
+                    state_file=settings.SENDGRID_RATE_STATE_FILE,
+                )
+    return _limiter
+
+
+def _send(sg: SendGridClient, message: Mail):
+    """
+    Send through the shared rate limiter. A 429 blocks the limiter until
+    X-RateLimit-Reset and is retried here up to SENDGRID_MAX_429_RETRIES
+    times before it is raised to Temporal. With the limiter off, the retry
+    sleeps until X-RateLimit-Reset itself (or backs off 1s, 2s, 4s, ...
+    without the header).
+    """
+    limiter = _rate_limiter()
+    recipients = len(message.personalizations)
+    for attempt in range(settings.SENDGRID_MAX_429_RETRIES + 1):
+        if limiter:
+            limiter.acquire()
+        try:
+            response = sg.send(message)
+        except HTTPError as e:
+            metrics.record_sendgrid_response(e.status_code, recipients)
+            if limiter:
+                limiter.update(e.headers, e.status_code)
+            if e.status_code == 429 and attempt < settings.SENDGRID_MAX_429_RETRIES:
+                metrics.record_sendgrid_rate_limited()
+                if not limiter:
+                    time.sleep(min(seconds_until_reset(e.headers, 2.0 ** attempt), 30.0))
+                continue
+            raise
+        metrics.record_sendgrid_response(response.status_code, recipients)
+        if limiter:
+            limiter.update(response.headers, response.status_code)
+        return response
 
 
 def _send_via_sendgrid(to_email: str, dynamic_data: dict, template_id: str):
@@ -10,11 +87,144 @@ def _send_via_sendgrid(to_email: str, dynamic_data: dict, template_id: str):
     )
     message.template_id = template_id
     message.dynamic_template_data = dynamic_data
-    sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-    response = sg.send(message)
+    response = _send(get_sendgrid_client(), message)
     return response.status_code
 
 
+def _send_batch_via_sendgrid(recipients: list[dict], template_id: str, on_sent=None) -> list[dict]:
+    """
+    Send one template to many recipients, one personalization each.
+    `recipients` is [{"to_email": ..., "dynamic_data": {...}}].
+    Returns [{"to_email": ..., "status_code": ...}] in input order.
+
+    SendGrid rejects a whole request with a 400 when any one personalization
+    is invalid; those recipients fail and the rest are resent (see
+    _send_chunk). 429/5xx are raised so Temporal retries; 400s about the
+    request itself and 401/403 fail the activity without retries.
+    `on_sent(chunk, status_code)` is called after each accepted request.
+    """
+    # the Mail helper cannot serialize an address it fails to parse; fail those here
+    status = {i: 400 for i, r in enumerate(recipients) if not To(r["to_email"] or "").email}
+    valid = [i for i in range(len(recipients)) if i not in status]
+    sg = get_sendgrid_client()
+    for start in range(0, len(valid), MAX_PERSONALIZATIONS):
+        indexes = valid[start:start + MAX_PERSONALIZATIONS]
+        status_codes = _send_chunk(sg, [recipients[i] for i in indexes], template_id, on_sent)
+        status.update(zip(indexes, status_codes))
+    return [{"to_email": r["to_email"], "status_code": status[i]} for i, r in enumerate(recipients)]
+
+
+def _batch_message(chunk: list[dict], template_id: str) -> Mail:
+    message = Mail(from_email=settings.SENDGRID_FROM_EMAIL)
+    message.template_id = template_id
+    for i, r in enumerate(chunk):
+        personalization = Personalization()
+        personalization.add_to(To(r["to_email"]))
+        personalization.dynamic_template_data = r["dynamic_data"]
+        message.add_personalization(personalization, index=i)
+    return message
+
+
+def _error_body(e: HTTPError) -> str:
+    body = e.body.decode("utf-8", "replace") if isinstance(e.body, bytes) else str(e.body or "")
+    return body[:500]
+
+
+def _invalid_personalizations(e: HTTPError) -> Optional[set[int]]:
+    """
+    Indexes of the personalizations a 400 names ("field": "personalizations.3.to.0.email"),
+    or None when any error is about the request as a whole.
+    """
+    try:
+        errors = json.loads(e.body)["errors"]
+    except (TypeError, ValueError, KeyError):
+        return None
+    if not errors:
+        return None
+    indexes = set()
+    for error in errors:
+        match = _PERSONALIZATION_FIELD.match(str(error.get("field") or ""))
+        if not match:
+            return None
+        indexes.add(int(match.group(1)))
+    return indexes
+
+
+def _send_chunk(sg: SendGridClient, chunk: list[dict], template_id: str, on_sent=None) -> list[int]:
+    """
+    Send one request's worth of recipients; returns a status code per recipient.
+    A 400 naming only personalizations fails just those recipients and the
+    rest are resent; any other 400 and 401/403 are the same for every
+    recipient and attempt, so they fail the activity without retries.
+    Other 4xx (besides 429) are reported per recipient.
+    """
+    codes: dict[int, int] = {}
+    pending = list(range(len(chunk)))
+    while pending:
+        part = [chunk[i] for i in pending]
+        try:
+            status_code = _send(sg, _batch_message(part, template_id)).status_code
+        except HTTPError as e:
+            if e.status_code == 429 or e.status_code >= 500:
+                raise
+            if e.status_code in (400, 401, 403):
+                invalid = _invalid_personalizations(e) if e.status_code == 400 else None
+                if not invalid or max(invalid) >= len(part):
+                    raise ApplicationError(
+                        f"SendGrid rejected the request ({e.status_code}): {_error_body(e)}",
+                        non_retryable=True,
+                    )
+                codes.update((pending[j], 400) for j in invalid)
+                pending = [i for j, i in enumerate(pending) if j not in invalid]
+                continue
+            codes.update((i, e.status_code) for i in pending)
+            break
+        if on_sent:
+            on_sent(part, status_code)
+        codes.update((i, status_code) for i in pending)
+        break
+    return [codes[i] for i in range(len(chunk))]
+
+
+def _ledger_recipient(r: dict) -> str:
+    # the ledger key already holds the template, so one email per address per template
+    return r["to_email"].strip().lower()
+
+
+def send_template_batch(template: str, recipients: list[dict], batch_id: Optional[str] = None, phase: Optional[str] = None) -> list[dict]:
+    """
+    Send a TEMPLATES key (e.g. "member_type1") to a list of recipients.
+
+    With a batch_id, recipients the send ledger already has for
+    (batch_id, phase, template) are skipped and reported with their recorded
+    status code and "ledger": True; new 2xx sends are recorded request by
+    request, so a retry after a partial failure resends nothing delivered.
+    """
+    if template not in TEMPLATES:
+        raise ValueError(f"unknown email template: {template}")
+    template_id = getattr(settings, TEMPLATES[template])
+    if not batch_id:
+        return _send_batch_via_sendgrid(recipients, template_id)
+
+    done = ledger.lookup(batch_id, phase, template, (_ledger_recipient(r) for r in recipients))
+    pending = [r for r in recipients if _ledger_recipient(r) not in done]
+    def record(chunk: list[dict], status_code: int):
+        if 200 <= status_code < 300:
+            ledger.record(batch_id, phase, template, [(_ledger_recipient(r), str(status_code), None) for r in chunk])
+
+    outcomes = _send_batch_via_sendgrid(pending, template_id, on_sent=record)
+    sent = {_ledger_recipient(r): o["status_code"] for r, o in zip(pending, outcomes)}
+
+    results = []
+    for r in recipients:
+        key = _ledger_recipient(r)
+        if key in done:
+            results.append({"to_email": r["to_email"], "status_code": int(done[key][0]), "ledger": True})
+        else:
+            results.append({"to_email": r["to_email"], "status_code": sent[key]})
+    return results
+
+
 
 # --- Broker templates ---
 def send_broker_email_type1(to_email: str, dynamic_data: dict):
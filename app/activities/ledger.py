@@ -0,0 +1,84 @@
+# app/activities/ledger.py
+"""
+Durable send ledger: one row per (batch, phase, template, recipient) that
+was delivered or provisioned. Email and account activities check it in bulk
+before acting and record outcomes after, so re-running or retrying a batch
+under the same batch_id only does the remaining work.
+
+Backed by SQLite (WAL mode) at SEND_LEDGER_PATH, so it only covers the
+workers on one host: the email and accounts roles must all run there, with
+the file on local disk. SQLite's WAL does not work over network filesystems,
+so do not put it on a shared mount; with those roles spread over several
+hosts each host keeps its own ledger and a re-run resends what another host
+did. An empty SEND_LEDGER_PATH disables it.
+"""
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, Iterable, List, Tuple
+from app.settings import settings
+
+# SQLite's default limit on bound parameters is 999
+_IN_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sends (
+    batch_id   TEXT NOT NULL,
+    phase      TEXT NOT NULL,
+    template   TEXT NOT NULL,
+    recipient  TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    detail     TEXT,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (batch_id, phase, template, recipient)
+)
+"""
+
+_initialized = False
+
+
+def enabled() -> bool:
+    return bool(settings.SEND_LEDGER_PATH)
+
+
+def _connect() -> sqlite3.Connection:
+    global _initialized
+    conn = sqlite3.connect(settings.SEND_LEDGER_PATH, timeout=30)
+    if not _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(_SCHEMA)
+        conn.commit()
+        _initialized = True
+    return conn
+
+
+def lookup(batch_id: str, phase: str, template: str, recipients: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+    """Return {recipient: (status, detail)} for recipients already recorded under this key."""
+    recipients = list(dict.fromkeys(recipients))
+    found: Dict[str, Tuple[str, str]] = {}
+    if not enabled() or not recipients:
+        return found
+    with closing(_connect()) as conn:
+        for start in range(0, len(recipients), _IN_CHUNK):
+            chunk = recipients[start:start + _IN_CHUNK]
+            rows = conn.execute(
+                "SELECT recipient, status, detail FROM sends"
+                " WHERE batch_id = ? AND phase = ? AND template = ?"
+                f" AND recipient IN ({','.join('?' * len(chunk))})",
+                (batch_id, phase, template, *chunk),
+            ).fetchall()
+            found.update({recipient: (status, detail) for recipient, status, detail in rows})
+    return found
+
+
+def record(batch_id: str, phase: str, template: str, outcomes: List[Tuple[str, str, str]]):
+    """Record (recipient, status, detail) outcomes; later records for a recipient win."""
+    if not enabled() or not outcomes:
+        return
+    now = time.time()
+    with closing(_connect()) as conn, conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO sends (batch_id, phase, template, recipient, status, detail, recorded_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(batch_id, phase, template, recipient, status, detail, now) for recipient, status, detail in outcomes],
+        )
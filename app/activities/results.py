@@ -0,0 +1,45 @@
+# app/activities/results.py
+"""
+Per-recipient batch results, kept out of workflow history.
+
+Workflows keep only counters and a failure sample (ResultSummary) and write
+every ItemResult here as JSON lines under RESULTS_DIR/<results_id>/. Each
+write is a named part replaced atomically, so activity retries never
+duplicate lines. read_results() streams a whole batch back.
+"""
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List
+from app.settings import settings
+
+
+def _batch_dir(results_id: str) -> str:
+    # results ids are workflow ids; keep them to one safe path segment
+    return os.path.join(settings.RESULTS_DIR, re.sub(r"[^A-Za-z0-9_.-]", "_", results_id))
+
+
+def write_results(results_id: str, part: str, items: List[Dict[str, Any]]) -> int:
+    """Write `items` as RESULTS_DIR/<results_id>/<part>.jsonl, replacing any earlier attempt."""
+    directory = _batch_dir(results_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]", "_", part) + ".jsonl")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(item) + "\n")
+    os.replace(tmp_path, path)
+    return len(items)
+
+
+def read_results(results_id: str) -> Iterator[Dict[str, Any]]:
+    """Yield every result line written for `results_id`."""
+    directory = _batch_dir(results_id)
+    if not os.path.isdir(directory):
+        return
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
@@ -1,30 +1,89 @@
 # app/activities/sheets.py
-import gspread
-from google.oauth2.service_account import Credentials
-from typing import List, Dict
+import threading
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
 from app.settings import settings
 
+# gspread/google-auth are imported on first use: workers that never read a
+# sheet (email/account roles) start without them
+if TYPE_CHECKING:
+    import gspread
+
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
 
-def _client():
-    info = settings.service_account_info()
-    if not info:
-        raise RuntimeError("GOOGLE_SERVICE_ACCOUNT_JSON not set")
-    creds = Credentials.from_service_account_info(info, scopes=SCOPES)
-    return gspread.authorize(creds)
+_gc: Optional["gspread.Client"] = None
+_gc_lock = threading.Lock()
+
+
+def _client() -> "gspread.Client":
+    """
+    Shared gspread client, authorized once per process.
+    google-auth refreshes the access token on its own when it expires.
+    """
+    global _gc
+    if _gc is None:
+        with _gc_lock:
+            if _gc is None:
+                import gspread
+                from google.oauth2.service_account import Credentials
+
+                info = settings.service_account_info()
+                if not info:
+                    raise RuntimeError("GOOGLE_SERVICE_ACCOUNT_JSON not set")
+                creds = Credentials.from_service_account_info(info, scopes=SCOPES)
+                _gc = gspread.authorize(creds)
+    return _gc
+
+
+def _spreadsheet():
+    return _client().open_by_key(settings.SHEET_ID)
+
 
 def list_tabs() -> List[str]:
-    gc = _client()
-    sh = gc.open_by_key(settings.SHEET_ID)
+    sh = _spreadsheet()
     return [ws.title for ws in sh.worksheets()]
 
-def read_batch_rows(tab_name: str) -> List[Dict]:
+
+def iter_batch_rows(tab_name: str, columns: List[str], chunk_rows: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Stream rows from the tab, reading only `columns` (by header name).
+    Rows are fetched in ranges of `chunk_rows` (default SHEETS_READ_CHUNK_ROWS),
+    one batch_get request per range. Columns missing from the header come back as None.
+    Values are numericised like get_all_records does ("1,848" -> 1848).
+    """
+    from gspread.utils import numericise, rowcol_to_a1
+
+    ws = _spreadsheet().worksheet(tab_name)
+    header = ws.row_values(1)
+    positions = {name: header.index(name) + 1 for name in columns if name in header}
+    if not positions:
+        # none of the columns exist (e.g. a renamed header): still yield every
+        # row, with None values, so the rows are reported rather than dropped
+        for record in ws.get_all_records(head=1):
+            yield {name: record.get(name) for name in columns}
+        return
+
+    chunk_rows = chunk_rows or settings.SHEETS_READ_CHUNK_ROWS
+    names = list(positions)
+    for start in range(2, ws.row_count + 1, chunk_rows):
+        end = min(start + chunk_rows - 1, ws.row_count)
+        ranges = [f"{rowcol_to_a1(start, positions[n])}:{rowcol_to_a1(end, positions[n])}" for n in names]
+        values = [vr[0] if vr else [] for vr in ws.batch_get(ranges, major_dimension="COLUMNS")]
+        height = max((len(v) for v in values), default=0)
+        for i in range(height):
+            row = {n: (numericise(v[i]) if i < len(v) else "") for n, v in zip(names, values)}
+            row.update({n: None for n in columns if n not in positions})
+            yield row
+
+
+def read_batch_rows(tab_name: str, columns: Optional[List[str]] = None) -> List[Dict]:
     """
-    Returns all rows from the tab as a list of dicts.
+    Returns rows from the tab as a list of dicts.
     Each dict looks like {"Client Name": "...", "Client id": "..."}.
+    Pass `columns` to read only those columns (range-chunked); otherwise
+    the whole tab is read.
     """
-    gc = _client()
-    sh = gc.open_by_key(settings.SHEET_ID)
-    ws = sh.worksheet(tab_name)
+    if columns:
+        return list(iter_batch_rows(tab_name, columns))
+    ws = _spreadsheet().worksheet(tab_name)
     rows = ws.get_all_records(head=1)
     return rows
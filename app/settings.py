@@ -1,7 +1,8 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 import json
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -18,14 +19,65 @@ class Settings(BaseSettings):
     DATA_API_DB_KEY: str
     DATA_API_ACCOUNTS_DB_KEY: str 
     AUTH_STATIC_BEARER_TOKEN: str
+    # max values per IN-filter request for bulk lookups
+    DATA_API_IN_CHUNK_SIZE: int = 500
+    # shared keep-alive HTTP client (see app/utils/http_client.py); None sizes the
+    # pool for every lookups + accounts slot, in case both roles share a process
+    DATA_API_POOL_SIZE: Optional[int] = None
+    DATA_API_GZIP_REQUESTS: bool = False
+    DATA_API_HTTP2: bool = False  # needs httpx[http2]
+    # worker-local cache of selects on directory tables (see app/utils/select_cache.py):
+    # TTL seconds per table (tables not listed are never cached) and a total row bound
+    DATA_API_CACHE_TTLS: Dict[str, float] = {
+        "clients": 900,
+        "brokers": 900,
+        "clients_to_brokers": 900,
+        "client_contacts": 900,
+    }
+    DATA_API_CACHE_MAX_ROWS: int = 200000
+    # /crud is only known to take single-row {"fields": ...} inserts; enable
+    # multi-row {"rows": [...]} inserts only against a Data API that supports them
+    ACCOUNTS_MULTI_ROW_INSERTS: bool = False
+    # rows per multi-row /crud insert when provisioning accounts in bulk
+    ACCOUNTS_INSERT_CHUNK_SIZE: int = 500
+    # SQLite send ledger (see app/activities/ledger.py); local disk only, so it covers
+    # email/accounts workers on one host (not a network mount); "" disables it
+    SEND_LEDGER_PATH: Optional[str] = "send_ledger.sqlite3"
+    # per-recipient batch results (see app/activities/results.py); share it between workers
+    RESULTS_DIR: str = "results"
+
+    # --- Worker ---
+    # activity slots (one executor thread each) per worker role, see worker.py
+    WORKER_LOOKUPS_CONCURRENCY: int = 20
+    WORKER_EMAILS_CONCURRENCY: int = 10
+    WORKER_ACCOUNTS_CONCURRENCY: int = 10
+    # metrics export (see app/utils/metrics.py); e.g. "0.0.0.0:9464", or an OTLP gRPC url
+    METRICS_PROMETHEUS_BIND_ADDRESS: Optional[str] = None
+    METRICS_OTEL_ENDPOINT: Optional[str] = None
+    # zlib-compress Temporal payloads at least this big (see app/utils/codec.py); <= 0 disables it
+    PAYLOAD_COMPRESSION_THRESHOLD_BYTES: int = 4096
+    PAYLOAD_COMPRESSION_LEVEL: int = 6
 
     # --- Google Sheets ---
     GOOGLE_SERVICE_ACCOUNT_FILE: Optional[str] = None
     SHEET_ID: str
+    # rows per range request when reading projected columns
+    SHEETS_READ_CHUNK_ROWS: int = 5000
+
+    # --- Batch files (CSV / Parquet sources, see app/activities/batch_files.py) ---
+    BATCH_FILES_DIR: str = "."
+    BATCH_FILE_CHUNK_ROWS: int = 50000
 
     # --- SendGrid ---
     SENDGRID_API_KEY: str
     SENDGRID_FROM_EMAIL: str
+    SENDGRID_API_HOST: str = "https://api.sendgrid.com"
+    # worker-wide pacing of SendGrid requests (see app/utils/rate_limit.py); <= 0 disables it
+    SENDGRID_MAX_REQUESTS_PER_SEC: float = 10.0
+    SENDGRID_RATE_BURST: int = 10
+    SENDGRID_MAX_429_RETRIES: int = 3
+    # share the limiter between workers on one host through this file
+    SENDGRID_RATE_STATE_FILE: Optional[str] = None
 
     # Broker templates
     SENDGRID_BROKER_TEMPLATE_1: str
@@ -55,4 +107,20 @@ class Settings(BaseSettings):
         return None
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
+
+
+class _LazySettings:
+    """
+    Stand-in for the Settings instance that reads the environment on first
+    attribute access, so importing app modules (worker startup, workflow
+    sandbox validation) does not parse and validate env/.env up front.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+
+settings = _LazySettings()
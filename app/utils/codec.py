@@ -0,0 +1,46 @@
+# app/utils/codec.py
+"""
+zlib payload codec for Temporal.
+
+Payloads at or above `threshold` bytes (recipient lists, rosters, sheet rows)
+are stored compressed in workflow history and sent compressed over gRPC;
+smaller ones, and ones that do not shrink, pass through untouched. Every
+client that reads these workflows (worker, starter scripts, a codec server
+for the UI) needs the same codec — use app.utils.temporal_client.connect().
+"""
+import zlib
+from typing import Iterable, List
+
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import PayloadCodec
+
+from app.utils import metrics
+
+ENCODING = b"binary/zlib"
+
+
+class ZlibPayloadCodec(PayloadCodec):
+    def __init__(self, threshold: int = 4096, level: int = 6):
+        self.threshold = threshold
+        self.level = level
+
+    async def encode(self, payloads: Iterable[Payload]) -> List[Payload]:
+        return [self._encode(p) for p in payloads]
+
+    async def decode(self, payloads: Iterable[Payload]) -> List[Payload]:
+        return [self._decode(p) for p in payloads]
+
+    def _encode(self, payload: Payload) -> Payload:
+        raw = payload.SerializeToString()
+        if len(raw) < self.threshold:
+            return payload
+        compressed = zlib.compress(raw, self.level)
+        metrics.record_payload_compression(len(raw), len(compressed))
+        if len(compressed) >= len(raw):
+            return payload
+        return Payload(metadata={"encoding": ENCODING}, data=compressed)
+
+    def _decode(self, payload: Payload) -> Payload:
+        if payload.metadata.get("encoding") != ENCODING:
+            return payload
+        return Payload.FromString(zlib.decompress(payload.data))
@@ -0,0 +1,163 @@
+# app/utils/http_client.py
+import gzip
+import json
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from python_http_client.exceptions import HTTPError
+from requests.adapters import HTTPAdapter
+
+from app.settings import settings
+
+
+class DataApiClient:
+    """
+    Process-wide keep-alive client for the Data API.
+    One connection pool is shared by every activity on the worker, so
+    lookups reuse TCP+TLS connections instead of opening one per query.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        pool_size: int = 20,
+        gzip_requests: bool = False,
+        http2: bool = False,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.gzip_requests = gzip_requests
+        self.http2 = http2
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept-Encoding": "gzip",
+        }
+
+        if http2:
+            try:
+                import httpx
+            except ImportError:
+                raise RuntimeError("DATA_API_HTTP2 requires the httpx[http2] package")
+            self._session = httpx.Client(
+                http2=True,
+                headers=headers,
+                limits=httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=pool_size,
+                ),
+            )
+        else:
+            self._session = requests.Session()
+            self._session.headers.update(headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+
+    def post(
+        self,
+        path: str,
+        json_body: Any,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: float = 120,
+    ):
+        """POST a JSON body to `path` and return the response (not yet raise_for_status'd)."""
+        content = json.dumps(json_body).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.gzip_requests:
+            content = gzip.compress(content)
+            headers["Content-Encoding"] = "gzip"
+
+        url = f"{self.base_url}{path}"
+        if self.http2:
+            return self._session.post(url, content=content, params=params, headers=headers, timeout=timeout)
+        return self._session.post(url, data=content, params=params, headers=headers, timeout=timeout)
+
+    def close(self):
+        self._session.close()
+
+
+_client: Optional[DataApiClient] = None
+_client_lock = threading.Lock()
+
+
+def get_data_api_client() -> DataApiClient:
+    """Return the shared Data API client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = DataApiClient(
+                    base_url=settings.DATA_API_BASE_URL,
+                    token=settings.AUTH_STATIC_BEARER_TOKEN,
+                    pool_size=settings.DATA_API_POOL_SIZE
+                    or settings.WORKER_LOOKUPS_CONCURRENCY + settings.WORKER_ACCOUNTS_CONCURRENCY,
+                    gzip_requests=settings.DATA_API_GZIP_REQUESTS,
+                    http2=settings.DATA_API_HTTP2,
+                )
+    return _client
+
+
+def close_data_api_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+class SendGridClient:
+    """
+    Process-wide keep-alive client for SendGrid's v3 mail/send.
+    Takes the place of a SendGridAPIClient per message (whose urllib
+    transport opens a new TLS connection per request): every email activity
+    on the worker shares one connection pool. Errors are raised as
+    python_http_client HTTPError, like SendGridAPIClient.send.
+    """
+
+    def __init__(self, api_key: str, host: str, pool_size: int = 10):
+        self.url = f"{host.rstrip('/')}/v3/mail/send"
+        self._session = requests.Session()
+        self._session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def send(self, message, timeout: float = 60):
+        """POST a sendgrid Mail; returns the response, raises HTTPError on 4xx/5xx."""
+        response = self._session.post(self.url, data=json.dumps(message.get()), timeout=timeout)
+        if response.status_code >= 400:
+            raise HTTPError(response.status_code, response.reason, response.content, response.headers)
+        return response
+
+    def close(self):
+        self._session.close()
+
+
+_sendgrid: Optional[SendGridClient] = None
+_sendgrid_lock = threading.Lock()
+
+
+def get_sendgrid_client() -> SendGridClient:
+    """Return the shared SendGrid client, creating it on first use."""
+    global _sendgrid
+    if _sendgrid is None:
+        with _sendgrid_lock:
+            if _sendgrid is None:
+                _sendgrid = SendGridClient(
+                    api_key=settings.SENDGRID_API_KEY,
+                    host=settings.SENDGRID_API_HOST,
+                    pool_size=settings.WORKER_EMAILS_CONCURRENCY,
+                )
+    return _sendgrid
+
+
+def close_sendgrid_client():
+    global _sendgrid
+    with _sendgrid_lock:
+        if _sendgrid is not None:
+            _sendgrid.close()
+            _sendgrid = None
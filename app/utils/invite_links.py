@@ -1,5 +1,9 @@
 import jwt
+import json
 import os
+from functools import lru_cache
+from jwt.algorithms import HMACAlgorithm
+from jwt.utils import base64url_encode
 from datetime import datetime, timedelta, timezone
 from temporalio import workflow
 
@@ -33,3 +37,47 @@ def generate_invite_url(email: str, company_id: str, now: datetime = None, appli
 
     token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
     return f"{ORIGIN}/confirm-invitation?token={token}"
+
+
+@lru_cache(maxsize=4)
+def _prepared_hs256(secret_key: str):
+    """HS256 signer with the key prepared once, plus the constant header segment."""
+    algorithm = HMACAlgorithm(HMACAlgorithm.SHA256)
+    header = json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":"), sort_keys=True)
+    return algorithm, algorithm.prepare_key(secret_key), base64url_encode(header.encode("utf-8"))
+
+
+def generate_invite_tokens(
+    emails: list[str],
+    company_id: str,
+    iat: int,
+    exp: int,
+    applications=None,
+    secret_key: str = SECRET_KEY,
+    origin: str = ORIGIN,
+) -> list[str]:
+    """
+    Sign invite tokens for many members at once (same claims as
+    generate_invite_url, with iat/exp passed in). Tokens come back in
+    `emails` order; the link is f"{origin}/confirm-invitation?token={token}".
+    """
+    if applications is None:
+        applications = ["HEALTHCARE_PORTAL", "HEALTHCARE_MOBILE"]
+    algorithm, key, header_segment = _prepared_hs256(secret_key)
+
+    tokens = []
+    for email in emails:
+        payload = {
+            "email": email,
+            "set_new_pw": True,
+            "applications": applications,
+            "company_id": company_id,
+            "origin": origin,
+            "iat": iat,
+            "exp": exp,
+        }
+        payload_segment = base64url_encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        signing_input = header_segment + b"." + payload_segment
+        signature = base64url_encode(algorithm.sign(signing_input, key))
+        tokens.append((signing_input + b"." + signature).decode("ascii"))
+    return tokens
@@ -0,0 +1,103 @@
+# app/utils/metrics.py
+"""
+Worker metrics, recorded on the Temporal runtime's metric meter so they are
+exported next to the SDK's own worker metrics (task slots, schedule-to-start
+latency, ...) through one Prometheus endpoint or OpenTelemetry collector.
+Nothing is exported unless worker.py calls configure_runtime() first.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from temporalio import activity
+from temporalio.runtime import OpenTelemetryConfig, PrometheusConfig, Runtime, TelemetryConfig
+from temporalio.worker import ActivityInboundInterceptor, ExecuteActivityInput, Interceptor
+
+PREFIX = "member_migration_"
+
+_instruments: Dict[str, Any] = {}
+_instruments_lock = threading.Lock()
+
+
+def configure_runtime(prometheus_bind_address: Optional[str], otel_endpoint: Optional[str]) -> Optional[Runtime]:
+    """Install a default Temporal runtime exporting metrics; None when neither exporter is set."""
+    if otel_endpoint:
+        metrics = OpenTelemetryConfig(url=otel_endpoint)
+    elif prometheus_bind_address:
+        metrics = PrometheusConfig(bind_address=prometheus_bind_address, durations_as_seconds=True)
+    else:
+        return None
+    runtime = Runtime(telemetry=TelemetryConfig(metrics=metrics))
+    Runtime.set_default(runtime)
+    return runtime
+
+
+def _instrument(kind: str, name: str, description: str, unit: Optional[str] = None):
+    if name not in _instruments:
+        with _instruments_lock:
+            if name not in _instruments:
+                meter = Runtime.default().metric_meter
+                create = {
+                    "counter": meter.create_counter,
+                    "histogram": meter.create_histogram_float,
+                }[kind]
+                _instruments[name] = create(PREFIX + name, description, unit)
+    return _instruments[name]
+
+
+def record_data_api_request(operation: str, table: str, status: str, seconds: float):
+    attrs = {"operation": operation, "table": table, "status": status}
+    _instrument("counter", "data_api_requests", "Data API requests").add(1, attrs)
+    _instrument("histogram", "data_api_request_duration", "Data API request latency", "s").record(
+        seconds, {"operation": operation, "table": table}
+    )
+
+
+def record_data_api_cache(table: str, outcome: str):
+    _instrument("counter", "data_api_cache_lookups", "Worker-local Data API cache lookups by outcome").add(
+        1, {"table": table, "outcome": outcome}
+    )
+
+
+def record_sendgrid_response(status_code: int, recipients: int):
+    attrs = {"status_code": str(status_code)}
+    _instrument("counter", "sendgrid_requests", "SendGrid mail/send requests by status code").add(1, attrs)
+    _instrument("counter", "sendgrid_recipients", "SendGrid recipients by status code").add(recipients, attrs)
+
+
+def record_sendgrid_rate_limited():
+    _instrument("counter", "sendgrid_rate_limited", "SendGrid 429 responses retried in-process").add(1)
+
+
+def record_payload_compression(original_bytes: int, compressed_bytes: int):
+    _instrument("counter", "payload_bytes_uncompressed", "Temporal payload bytes before compression", "By").add(original_bytes)
+    _instrument("counter", "payload_bytes_compressed", "Temporal payload bytes after compression", "By").add(compressed_bytes)
+    _instrument("histogram", "payload_compression_ratio", "Uncompressed / compressed payload size").record(
+        original_bytes / max(1, compressed_bytes)
+    )
+
+
+class ActivityMetricsInterceptor(Interceptor):
+    """Records latency, outcome and retry attempts for every activity the worker runs."""
+
+    def intercept_activity(self, next: ActivityInboundInterceptor) -> ActivityInboundInterceptor:
+        return _ActivityMetricsInbound(next)
+
+
+class _ActivityMetricsInbound(ActivityInboundInterceptor):
+    async def execute_activity(self, input: ExecuteActivityInput) -> Any:
+        info = activity.info()
+        if info.attempt > 1:
+            _instrument("counter", "activity_retries", "Activity attempts after the first").add(
+                1, {"activity_type": info.activity_type}
+            )
+        started = time.monotonic()
+        outcome = "failed"
+        try:
+            result = await self.next.execute_activity(input)
+            outcome = "completed"
+            return result
+        finally:
+            _instrument("histogram", "activity_duration", "Activity execution latency", "s").record(
+                time.monotonic() - started, {"activity_type": info.activity_type, "outcome": outcome}
+            )
@@ -0,0 +1,115 @@
+# app/utils/rate_limit.py
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Mapping, Optional
+
+
+def _header(headers: Optional[Mapping], name: str) -> Optional[float]:
+    if headers is None:
+        return None
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def seconds_until_reset(headers: Optional[Mapping], default: float) -> float:
+    """Seconds until X-RateLimit-Reset (an epoch timestamp or a delta), or `default` without one."""
+    reset = _header(headers, "X-RateLimit-Reset")
+    if reset is None:
+        return default
+    if reset >= 1e9:
+        reset -= time.time()
+    return reset if reset > 0 else default
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket shared by every send on a worker (or by every worker
+    pointing at the same `state_file`).
+
+    The refill rate starts at `max_rate` and is re-derived from the
+    X-RateLimit-Remaining / X-RateLimit-Reset headers of each response, so
+    sends spread the remaining quota over the rest of the window. A 429
+    empties the bucket and blocks all callers until the reset time.
+    """
+
+    def __init__(self, max_rate: float, burst: int, min_rate: float = 0.2, state_file: Optional[str] = None):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.burst = max(1, burst)
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._state = self._initial_state()
+
+    def _initial_state(self) -> Dict[str, Any]:
+        return {"tokens": float(self.burst), "updated": time.time(), "rate": self.max_rate, "blocked_until": 0.0}
+
+    @contextmanager
+    def _locked_state(self):
+        with self._lock:
+            if not self.state_file:
+                yield self._state
+                return
+
+            # cross-process: the state lives in a small JSON file guarded by flock
+            import fcntl
+            fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, "r+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    raw = f.read()
+                    state = json.loads(raw) if raw else self._initial_state()
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refill(self, state: Dict[str, Any], now: float):
+        elapsed = max(0.0, now - state["updated"])
+        state["tokens"] = min(float(self.burst), state["tokens"] + elapsed * state["rate"])
+        state["updated"] = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` can be taken from the bucket."""
+        while True:
+            with self._locked_state() as state:
+                now = time.time()
+                self._refill(state, now)
+                if now < state["blocked_until"]:
+                    wait = state["blocked_until"] - now
+                elif state["tokens"] >= tokens:
+                    state["tokens"] -= tokens
+                    return
+                else:
+                    wait = (tokens - state["tokens"]) / state["rate"]
+            time.sleep(min(wait, 5.0))
+
+    def update(self, headers: Optional[Mapping], status_code: int):
+        """Adjust the bucket from a response's status code and X-RateLimit-* headers."""
+        remaining = _header(headers, "X-RateLimit-Remaining")
+        reset = _header(headers, "X-RateLimit-Reset")
+        with self._locked_state() as state:
+            now = time.time()
+            self._refill(state, now)
+            if reset is not None and reset < 1e9:
+                reset = now + reset  # seconds-until-reset rather than an epoch timestamp
+
+            if status_code == 429:
+                state["tokens"] = 0.0
+                state["blocked_until"] = max(state["blocked_until"], reset if reset and reset > now else now + 1.0)
+                return
+
+            if remaining is not None and reset is not None and reset > now:
+                window = max(reset - now, 1.0)
+                state["rate"] = min(self.max_rate, max(self.min_rate, remaining / window))
+                state["tokens"] = min(state["tokens"], remaining)
+            elif remaining is None:
+                state["rate"] = self.max_rate
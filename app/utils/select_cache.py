@@ -0,0 +1,112 @@
+# app/utils/select_cache.py
+"""
+Worker-local read-through cache for Data API selects on directory tables
+(clients, brokers, ...) that do not change during a migration, so
+concurrent workflows on one worker stop repeating identical lookups.
+
+Entries are keyed on (table, columns, filters) and expire after the table's
+TTL; tables without a TTL are never cached. A table can also be warmed as a
+whole: while that snapshot is fresh, any select on the table whose columns
+and filters it covers is answered locally. The cache is LRU-bounded by the
+total number of rows it holds.
+"""
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils import metrics
+
+_SNAPSHOT = "*"
+
+
+class SelectCache:
+    def __init__(self, ttls: Dict[str, float], max_rows: int = 200_000):
+        self.ttls = ttls
+        self.max_rows = max_rows
+        # key -> (expires_at, columns, rows); snapshots use key (table, "*")
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[str], List[Dict[str, Any]]]]" = OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+        self.stats: Counter = Counter()
+
+    def cacheable(self, table: str) -> bool:
+        return self.ttls.get(table, 0) > 0
+
+    @staticmethod
+    def _key(table: str, columns: List[str], filters: Optional[Dict[str, Any]]) -> Tuple:
+        return (table, tuple(columns), json.dumps(filters or {}, sort_keys=True, default=str))
+
+    def get(self, table: str, columns: List[str], filters: Optional[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Cached rows for this select, or None on a miss."""
+        if not self.cacheable(table):
+            return None
+        now = time.monotonic()
+        with self._lock:
+            rows = self._lookup(self._key(table, columns, filters), now)
+            if rows is None:
+                snapshot = self._lookup((table, _SNAPSHOT), now, with_columns=True)
+                if snapshot is not None:
+                    rows = _filter_snapshot(*snapshot, columns, filters or {})
+        outcome = "miss" if rows is None else "hit"
+        self.stats[(table, outcome)] += 1
+        metrics.record_data_api_cache(table, outcome)
+        return rows
+
+    def put(self, table: str, columns: List[str], filters: Optional[Dict[str, Any]], rows: List[Dict[str, Any]]):
+        if self.cacheable(table):
+            self._store(self._key(table, columns, filters), table, list(columns), rows)
+
+    def warm(self, table: str, columns: List[str], rows: List[Dict[str, Any]]):
+        """Store a whole-table snapshot of `columns`."""
+        if self.cacheable(table):
+            self._store((table, _SNAPSHOT), table, list(columns), rows)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+
+    def _lookup(self, key: Tuple, now: float, with_columns: bool = False):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, columns, rows = entry
+        if expires_at <= now:
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return (columns, rows) if with_columns else rows
+
+    def _store(self, key: Tuple, table: str, columns: List[str], rows: List[Dict[str, Any]]):
+        if len(rows) > self.max_rows:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (time.monotonic() + self.ttls[table], columns, rows)
+            self._rows += len(rows)
+            while self._rows > self.max_rows:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: Tuple):
+        _, _, rows = self._entries.pop(key)
+        self._rows -= len(rows)
+
+
+def _filter_snapshot(snapshot_columns: List[str], rows: List[Dict[str, Any]], columns: List[str],
+                     filters: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    # answer from the snapshot only when it has every column involved;
+    # list filters mean IN, compared as strings like the ids in the roster
+    if not set(columns) | set(filters) <= set(snapshot_columns):
+        return None
+    wanted = {
+        column: {str(v) for v in value} if isinstance(value, list) else {str(value)}
+        for column, value in filters.items()
+    }
+    return [
+        {c: row.get(c) for c in columns}
+        for row in rows
+        if all(str(row.get(column)) in values for column, values in wanted.items())
+    ]
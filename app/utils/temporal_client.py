@@ -0,0 +1,34 @@
+# app/utils/temporal_client.py
+"""
+One place to connect to Temporal Cloud, so the worker and every starter
+script share the same data converter (payload compression, see codec.py).
+"""
+import dataclasses
+
+from temporalio.client import Client
+from temporalio.converter import DataConverter
+
+from app.settings import settings
+from app.utils.codec import ZlibPayloadCodec
+
+
+def data_converter() -> DataConverter:
+    if settings.PAYLOAD_COMPRESSION_THRESHOLD_BYTES <= 0:
+        return DataConverter.default
+    return dataclasses.replace(
+        DataConverter.default,
+        payload_codec=ZlibPayloadCodec(
+            threshold=settings.PAYLOAD_COMPRESSION_THRESHOLD_BYTES,
+            level=settings.PAYLOAD_COMPRESSION_LEVEL,
+        ),
+    )
+
+
+async def connect() -> Client:
+    return await Client.connect(
+        target_host=settings.TEMPORAL_HOST,
+        namespace=settings.TEMPORAL_NAMESPACE,
+        api_key=settings.TEMPORAL_API_KEY,
+        tls=True,
+        data_converter=data_converter(),
+    )
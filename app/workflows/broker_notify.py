@@ -1,313 +1,307 @@
-from dataclasses import dataclass
+import dataclasses
 from typing import List, Dict, Any, Optional
 from collections import defaultdict
 from temporalio import workflow
-from app.utils.invite_links import generate_invite_url
-
-# Input data structure for batch processing
-@dataclass
-class BatchInput:
-    tab_name: str
-    brand_name: Optional[str] = None
-    app_name: Optional[str] = None
-    appstore_link: Optional[str] = None
-    playstore_link: Optional[str] = None
-    website_portal: Optional[str] = None
-    cta_url: Optional[str] = None
-    launch_date: Optional[str] = None
-
-# Result for each processed item (client)
-@dataclass
-class ItemResult:
-    client_id: int
-    status: str
-    detail: str
-
-# Result for the entire batch
-@dataclass
-class BatchResult:
-    tab_name: str
-    processed: List[ItemResult]
-
-# Timeout settings for activities
-DB_TIMEOUT = workflow.timedelta(minutes=2)
-EMAIL_TIMEOUT = workflow.timedelta(minutes=3)
-
-# Helper to build dynamic data for email templates
-def build_dynamic_data(client_id: int, inp: BatchInput, extra: Dict[str, Any] = None) -> Dict[str, Any]:
-    data = {
-        "client_id": client_id,
-        "brand_name": inp.brand_name,
-        "app_name": inp.app_name,
-        "appstore_link": inp.appstore_link,
-        "playstore_link": inp.playstore_link,
-        "website_portal": inp.website_portal,
-        "cta_url": inp.cta_url,
-        "launch_date": inp.launch_date,
-    }
-    if extra:
-        data.update(extra)
-    return data
+from app.workflows.common import (
+    BatchInput,
+    ItemResult,
+    BatchResult,
+    BatchPlan,
+    BatchProgress,
+    PhasePlan,
+    ResultSummary,
+    Send,
+    ShardInput,
+    DB_TIMEOUT,
+    DEFAULT_PHASE_CONCURRENCY,
+    EMAILS_TASK_QUEUE,
+    LOOKUPS_TASK_QUEUE,
+    ROSTER_TIMEOUT,
+    run_bounded,
+    write_results,
+)
+from app.workflows.phase_shard import PhaseShardWorkflow
+
+# Sheet column holding the client id; the only column the workflow reads
+CLIENT_ID_COLUMN = "Client id"
+
+# ResultSummary phase for rows rejected before any phase runs
+INPUT_PHASE = "input"
+
+# Status of a send folded into another one to the same address (or a broker digest)
+DEDUPLICATED = "deduplicated"
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
 
 # Main workflow definition for broker notification
 @workflow.defn(name="BrokerNotifyWorkflow")
 class BrokerNotifyWorkflow:
+    def __init__(self):
+        # collects the send plan instead of sending when BatchInput.dry_run
+        self.plan: Optional[BatchPlan] = None
+        # items the workflow records itself (not from a send), by phase
+        self.notes: Dict[str, List[ItemResult]] = defaultdict(list)
+        # for the progress query: phase in flight and counts of finished phases
+        self.tab_name = ""
+        self.phase = "resolving"
+        self.summary = ResultSummary()
+
     @workflow.run
     async def run(self, inp: BatchInput) -> BatchResult:
-        # Read rows from input tab
+        # Every email/account activity is ledgered under this batch id
+        inp = dataclasses.replace(inp, batch_id=inp.batch_id or workflow.info().workflow_id)
+        self.tab_name = inp.tab_name
+        if inp.dry_run:
+            self.plan = BatchPlan()
+
+        # Read the client id column from the input tab (or batch file)
         rows = await workflow.execute_activity(
             "read_rows_activity",
-            args=(inp.tab_name,),
-            schedule_to_close_timeout=DB_TIMEOUT,
-        )
-        # Get all valid client IDs from DB
-        valid_client_ids: list[int] = await workflow.execute_activity(
-            "get_all_client_ids_activity",
+            args=(inp.tab_name, [CLIENT_ID_COLUMN], inp.source, inp.source_path),
+            task_queue=LOOKUPS_TASK_QUEUE,
             schedule_to_close_timeout=DB_TIMEOUT,
         )
 
-        results: List[ItemResult] = []
+        summary = self.summary
         broker_to_clients: Dict[int, List[int]] = defaultdict(list)
         client_ids_from_sheet: List[int] = []
 
-        # Validate rows and map brokers to clients
+        # Parse client ids from the sheet
+        parsed_ids: List[int] = []
         for row in rows:
             try:
-                client_id = int(str(row.get("Client id")).strip())
+                parsed_ids.append(int(str(row.get(CLIENT_ID_COLUMN)).strip()))
             except Exception:
-                results.append(ItemResult(-1, "skipped", "invalid client id"))
-                continue
-            if client_id not in valid_client_ids:
-                results.append(ItemResult(client_id, "skipped", "client_id not found in DB"))
+                self.notes[INPUT_PHASE].append(ItemResult(-1, "skipped", "invalid client id"))
+
+        # Check only the sheet's client ids against the DB (one IN-filtered lookup)
+        valid_clients: Dict[str, Optional[str]] = await workflow.execute_activity(
+            "validate_client_ids_activity",
+            args=(list(dict.fromkeys(parsed_ids)),),
+            task_queue=LOOKUPS_TASK_QUEUE,
+            schedule_to_close_timeout=DB_TIMEOUT,
+        )
+
+        # Validate rows
+        for client_id in parsed_ids:
+            if str(client_id) not in valid_clients:
+                self.notes[INPUT_PHASE].append(ItemResult(client_id, "skipped", "client_id not found in DB"))
                 continue
             client_ids_from_sheet.append(client_id)
-            # Get broker IDs for each client
-            broker_ids: List[int] = await workflow.execute_activity(
-                "get_broker_ids_for_client_activity",
-                args=(client_id,),
-                schedule_to_close_timeout=DB_TIMEOUT,
-            )
+
+        # Resolve every recipient once (bulk queries); all phases read from this roster
+        roster: Dict[str, Any] = await workflow.execute_activity(
+            "resolve_roster_activity",
+            args=(list(dict.fromkeys(client_ids_from_sheet)),),
+            task_queue=LOOKUPS_TASK_QUEUE,
+            schedule_to_close_timeout=ROSTER_TIMEOUT,
+        )
+
+        # Map brokers to clients
+        for client_id in client_ids_from_sheet:
+            broker_ids: List[int] = roster["client_brokers"].get(str(client_id), [])
             if not broker_ids:
-                results.append(ItemResult(client_id, "not_found", "no broker mapping in clients_to_brokers"))
+                self.notes[INPUT_PHASE].append(ItemResult(client_id, "not_found", "no broker mapping in clients_to_brokers"))
                 continue
             for bid in broker_ids:
                 broker_to_clients[bid].append(client_id)
 
         # Phase 1: Send emails to brokers, clients, and members
-        await self.send_broker_emails_phase1(broker_to_clients, inp, results)
-        await workflow.sleep(workflow.timedelta(seconds=30))
-        await self.send_client_emails_phase1(client_ids_from_sheet, inp, results)
-        await workflow.sleep(workflow.timedelta(seconds=30))
-        await self.send_member_emails_phase1(client_ids_from_sheet, inp, results)
+        await self.run_phase("phase1_broker_email", "broker_type1",
+                             self.broker_sends(broker_to_clients, roster, self.notes["phase1_broker_email"]), inp, summary)
+        await self.wait(workflow.timedelta(seconds=30))
+        for client_id in client_ids_from_sheet:
+            if not roster["client_contacts"].get(str(client_id)):
+                self.notes["phase1_client_email"].append(ItemResult(client_id, "not_found", "no client contact emails found"))
+        await self.run_phase("phase1_client_email", "client_type1",
+                             self.client_sends(client_ids_from_sheet, roster, "client_contacts"), inp, summary)
+        await self.wait(workflow.timedelta(seconds=30))
+        self.record_clients_without_members(client_ids_from_sheet, roster, self.notes["phase1_member_email"])
+        await self.run_phase("phase1_member_email", "member_type1",
+                             self.client_sends(client_ids_from_sheet, roster, "members"), inp, summary)
 
         # Phase 2: Send reminder emails
-        await workflow.sleep(workflow.timedelta(minutes=1))
-        await self.send_broker_emails_phase2(broker_to_clients, inp, results)
-        await workflow.sleep(workflow.timedelta(seconds=30))
-        await self.send_client_emails_phase2(client_ids_from_sheet, inp, results)
-        await workflow.sleep(workflow.timedelta(seconds=30))
-        await self.send_member_emails_phase2(client_ids_from_sheet, inp, results)
+        await self.wait(workflow.timedelta(minutes=1))
+        await self.run_phase("phase2_broker_email", "broker_type2",
+                             self.broker_sends(broker_to_clients, roster, self.notes["phase2_broker_email"]), inp, summary)
+        await self.wait(workflow.timedelta(seconds=30))
+        await self.run_phase("phase2_client_email", "client_type2",
+                             self.client_sends(client_ids_from_sheet, roster, "client_contacts"), inp, summary)
+        await self.wait(workflow.timedelta(seconds=30))
+        self.record_clients_without_members(client_ids_from_sheet, roster, self.notes["phase2_member_email"])
+        await self.run_phase("phase2_member_email", "member_type2",
+                             self.client_sends(client_ids_from_sheet, roster, "members"), inp, summary)
 
         # Phase 3: Final follow-up emails
-        await workflow.sleep(workflow.timedelta(minutes=1))
-        await self.send_client_emails_phase3(client_ids_from_sheet, inp, results)
-        await workflow.sleep(workflow.timedelta(seconds=30))
-        await self.send_member_emails_phase3(client_ids_from_sheet, inp, results)
-
-        return BatchResult(tab_name=inp.tab_name, processed=results)
-
-    # Phase 1: Send emails to brokers
-    async def send_broker_emails_phase1(self, broker_to_clients, inp, results):
-        for broker_id, client_ids in broker_to_clients.items():
-            # Get broker email
-            to_email: Optional[str] = await workflow.execute_activity(
-                "get_broker_email_activity",
-                args=(broker_id,),
-                schedule_to_close_timeout=DB_TIMEOUT,
+        await self.wait(workflow.timedelta(minutes=1))
+        if inp.refresh_members_before_phase3 and not inp.dry_run:
+            # Members are the only part of the roster likely to change mid-run
+            roster["members"] = await workflow.execute_activity(
+                "refresh_roster_members_activity",
+                args=(client_ids_from_sheet,),
+                task_queue=LOOKUPS_TASK_QUEUE,
+                schedule_to_close_timeout=ROSTER_TIMEOUT,
             )
-            if not to_email:
-                for cid in client_ids:
-                    results.append(ItemResult(cid, "not_found", f"no email for broker {broker_id}"))
+        await self.run_phase("phase3_client_email", "client_type3",
+                             self.client_sends(client_ids_from_sheet, roster, "client_contacts"), inp, summary)
+        await self.wait(workflow.timedelta(seconds=30))
+        self.record_clients_without_members(client_ids_from_sheet, roster, self.notes["phase3_member_email"])
+        await self.run_phase("phase3_member_email", "member_type3",
+                             self.client_sends(client_ids_from_sheet, roster, "members"), inp, summary,
+                             provision_accounts=True)
+
+        # The workflow's own items join the shards' in the results artifact
+        for phase, items in self.notes.items():
+            if not items:
                 continue
-            for cid in client_ids:
-                # Get client name for email personalization
-                client_name: Optional[str] = await workflow.execute_activity(
-                    "get_client_name_activity",
-                    args=(cid,),
-                    schedule_to_close_timeout=DB_TIMEOUT,
-                )
-                dynamic_data = build_dynamic_data(cid, inp, {"broker_id": broker_id, "client_name": client_name})
-                # Send broker email (phase 1)
-                status_code = await workflow.execute_activity(
-                    "send_broker_email_type1_activity",
-                    args=(to_email, dynamic_data),
-                    schedule_to_close_timeout=EMAIL_TIMEOUT,
-                )
-                results.append(ItemResult(cid, "sent", f"phase1_broker_email:{status_code}"))
+            summary.add(phase, items)
+            await write_results(inp.batch_id, f"{workflow.info().workflow_id}-{phase}", phase, items,
+                                inp.email_batch_size, inp.concurrency or DEFAULT_PHASE_CONCURRENCY)
 
-    # Phase 1: Send emails to clients
-    async def send_client_emails_phase1(self, client_ids, inp, results):
-        for client_id in client_ids:
-            # Get client contact emails
-            emails: List[str] = await workflow.execute_activity(
-                "get_client_emails_activity",
-                args=(client_id,),
-                schedule_to_close_timeout=DB_TIMEOUT,
+        if self.plan is not None:
+            await self.estimate_duration(inp)
+        self.phase = "done"
+
+        return BatchResult(
+            tab_name=inp.tab_name,
+            counts=summary.counts,
+            failures=summary.failures,
+            results_id=inp.batch_id,
+            plan=self.plan,
+        )
+
+    @workflow.query
+    def progress(self) -> BatchProgress:
+        return BatchProgress(tab_name=self.tab_name, phase=self.phase, counts=self.summary.counts,
+                             workflow_id=workflow.info().workflow_id)
+
+    # Push progress to the workflow tracking this batch (a migration wave), if any
+    async def report_progress(self, inp: BatchInput):
+        if inp.progress_workflow_id:
+            await workflow.get_external_workflow_handle(inp.progress_workflow_id).signal(
+                "batch_progress", self.progress()
             )
-            if not emails:
-                results.append(ItemResult(client_id, "not_found", "no client contact emails found"))
-                continue
-            for to_email in emails:
-                dynamic_data = build_dynamic_data(client_id, inp)
-                # Send client email (phase 1)
-                status_code = await workflow.execute_activity(
-                    "send_client_email_type1_activity",
-                    args=(to_email, dynamic_data),
-                    schedule_to_close_timeout=EMAIL_TIMEOUT,
-                )
-                results.append(ItemResult(client_id, "sent", f"phase1_client_email:{to_email}:{status_code}"))
 
-    # Phase 1: Send emails to members
-    async def send_member_emails_phase1(self, client_ids, inp, results):
-        for client_id in client_ids:
-            # Get member emails for client
-            member_emails: List[str] = await workflow.execute_activity(
-                "get_member_emails_activity",
-                args=(client_id,),
-                schedule_to_close_timeout=DB_TIMEOUT,
+    # Sleep between templates/phases; a dry run only adds it to the plan
+    async def wait(self, delta):
+        if self.plan is not None:
+            self.plan.wait_seconds += delta.total_seconds()
+            return
+        await workflow.sleep(delta)
+
+    # Dry run: fixed waits plus the plan's SendGrid requests at the email workers' rate
+    async def estimate_duration(self, inp: BatchInput):
+        rate = await workflow.execute_activity(
+            "get_send_rate_activity",
+            task_queue=EMAILS_TASK_QUEUE,
+            schedule_to_close_timeout=DB_TIMEOUT,
+        )
+        plan = self.plan
+        plan.total_emails = sum(p.unique_recipients for p in plan.phases)
+        plan.total_requests = sum(p.sendgrid_requests for p in plan.phases)
+        if rate and rate > 0:
+            plan.send_rate = rate
+            plan.estimated_seconds = plan.wait_seconds + plan.total_requests / rate
+
+    # Send one template to all of a phase's recipients through PhaseShardWorkflow children
+    async def run_phase(self, label, template, sends, inp, summary, provision_accounts=False):
+        self.phase = label
+        sends = self.dedupe(label, sends)
+        if self.plan is not None:
+            # same split as the shards below and PhaseShardWorkflow.send_emails
+            size, batch_size = max(1, inp.shard_size), max(1, min(inp.email_batch_size, 1000))
+            requests = sum(-(-len(sends[i:i + size]) // batch_size) for i in range(0, len(sends), size))
+            duplicates = sum(1 for item in self.notes[label] if item.status == DEDUPLICATED)
+            # recipients before dedup: the unique ones plus every send (or broker
+            # digest entry) folded into them
+            self.plan.phases.append(PhasePlan(label, template, len(sends) + duplicates, len(sends), duplicates, requests))
+            return
+
+        size = max(1, inp.shard_size)
+        shards = [sends[i:i + size] for i in range(0, len(sends), size)]
+
+        # the batch's activity and email budgets are split evenly over the shards running at once
+        parallel = max(1, min(inp.max_parallel_shards, len(shards)))
+        budgets = {}
+        if inp.concurrency:
+            budgets["concurrency"] = max(1, inp.concurrency // parallel)
+        if inp.max_emails_per_minute:
+            budgets["max_emails_per_minute"] = max(1, inp.max_emails_per_minute // parallel)
+        shard_inp = dataclasses.replace(inp, **budgets)
+
+        def start(index, shard):
+            return lambda: workflow.execute_child_workflow(
+                PhaseShardWorkflow.run,
+                ShardInput(
+                    label=label,
+                    template=template,
+                    sends=shard,
+                    inp=shard_inp,
+                    provision_accounts=provision_accounts,
+                ),
+                id=f"{workflow.info().workflow_id}-{label}-{index}",
             )
-            if not member_emails:
-                results.append(ItemResult(client_id, "skipped", "no ACTIVE members found for client_id"))
-                continue
-            for to_email in member_emails:
-                dynamic_data = build_dynamic_data(client_id, inp)
-                # Send member email (phase 1)
-                status_code = await workflow.execute_activity(
-                    "send_member_email_type1_activity",
-                    args=(to_email, dynamic_data),
-                    schedule_to_close_timeout=EMAIL_TIMEOUT,
+
+        for shard_summary in await run_bounded(
+            [start(index, shard) for index, shard in enumerate(shards)],
+            inp.max_parallel_shards,
+        ):
+            summary.merge(shard_summary)
+        await self.report_progress(inp)
+
+    # Collapse sends to one per normalized address (the phase fixes the template);
+    # the dropped ones are recorded as DEDUPLICATED against the kept send
+    def dedupe(self, label, sends: List[Send]) -> List[Send]:
+        kept: Dict[str, Send] = {}
+        for send in sends:
+            key = normalize_email(send.to_email)
+            first = kept.setdefault(key, send)
+            if first is not send:
+                self.notes[label].append(
+                    ItemResult(send.client_id, DEDUPLICATED, f"{label}:{send.to_email}: sent once, with client {first.client_id}")
                 )
-                results.append(ItemResult(client_id, "sent", f"phase1_member_email:{to_email}:{status_code}"))
+        return list(kept.values())
 
-    # Phase 2: Send reminder emails to brokers
-    async def send_broker_emails_phase2(self, broker_to_clients, inp, results):
+    # Build one digest send per broker address, listing every sheet client it serves
+    def broker_sends(self, broker_to_clients, roster, results) -> List[Send]:
+        digests: Dict[str, Dict[str, Any]] = {}
         for broker_id, client_ids in broker_to_clients.items():
-            # Get broker email
-            to_email: Optional[str] = await workflow.execute_activity(
-                "get_broker_email_activity",
-                args=(broker_id,),
-                schedule_to_close_timeout=DB_TIMEOUT,
-            )
+            to_email: Optional[str] = roster["brokers"].get(str(broker_id))
             if not to_email:
                 for cid in client_ids:
                     results.append(ItemResult(cid, "not_found", f"no email for broker {broker_id}"))
                 continue
+            # brokers sharing an address get one digest between them
+            digest = digests.setdefault(normalize_email(to_email), {"to_email": to_email, "broker_id": broker_id, "clients": {}})
             for cid in client_ids:
-                # Get client name for email personalization
-                client_name: Optional[str] = await workflow.execute_activity(
-                    "get_client_name_activity",
-                    args=(cid,),
-                    schedule_to_close_timeout=DB_TIMEOUT,
-                )
-                dynamic_data = build_dynamic_data(cid, inp, {"broker_id": broker_id, "client_name": client_name})
-                # Send broker email (phase 1)
-                status_code = await workflow.execute_activity(
-                    "send_broker_email_type2_activity",
-                    args=(to_email, dynamic_data),
-                    schedule_to_close_timeout=EMAIL_TIMEOUT,
-                )
-                results.append(ItemResult(cid, "sent", f"phase2_broker_email:{status_code}"))
+                digest["clients"].setdefault(cid, roster["client_names"].get(str(cid)))
 
-    # Phase 2: Send reminder emails to clients
-    async def send_client_emails_phase2(self, client_ids, inp, results):
-        for client_id in client_ids:
-            emails: List[str] = await workflow.execute_activity(
-                "get_client_emails_activity",
-                args=(client_id,),
-                schedule_to_close_timeout=DB_TIMEOUT,
-            )
-            for to_email in emails:
-                dynamic_data = build_dynamic_data(client_id, inp)
-                # Send client reminder email (phase 2)
-                status_code = await workflow.execute_activity(
-                    "send_client_email_type2_activity",
-                    args=(to_email, dynamic_data),
-                    schedule_to_close_timeout=EMAIL_TIMEOUT,
-                )
-                results.append(ItemResult(client_id, "sent", f"phase2_client_email:{to_email}:{status_code}"))
-
-    # Phase 2: Send reminder emails to members
-    async def send_member_emails_phase2(self, client_ids, inp, results):
-        for client_id in client_ids:
-            member_emails: List[str] = await workflow.execute_activity(
-                "get_member_emails_activity",
-                args=(client_id,),
-                schedule_to_close_timeout=DB_TIMEOUT,
-            )
-            if not member_emails:
-                results.append(ItemResult(client_id, "skipped", "no ACTIVE members found for client_id"))
-                continue
-            for to_email in member_emails:
-                dynamic_data = build_dynamic_data(client_id, inp)
-                # Send member reminder email (phase 2)
-                status_code = await workflow.execute_activity(
-                    "send_member_email_type2_activity",
-                    args=(to_email, dynamic_data),
-                    schedule_to_close_timeout=EMAIL_TIMEOUT,
-                )
-                results.append(ItemResult(client_id, "sent", f"phase2_member_email:{to_email}:{status_code}"))
+        sends = []
+        for digest in digests.values():
+            client_ids = list(digest["clients"])
+            clients = [{"client_id": cid, "client_name": name} for cid, name in digest["clients"].items()]
+            sends.append(Send(client_ids[0], digest["to_email"], {
+                "broker_id": digest["broker_id"],
+                # single-client templates keep reading client_name
+                "client_name": ", ".join(c["client_name"] or str(c["client_id"]) for c in clients),
+                "clients": clients,
+                "client_count": len(clients),
+            }))
+            for cid in client_ids[1:]:
+                results.append(ItemResult(cid, DEDUPLICATED, f"in broker digest to {digest['to_email']}"))
+        return sends
 
-    # Phase 3: Send final follow-up emails to clients
-    async def send_client_emails_phase3(self, client_ids, inp, results):
-        for client_id in client_ids:
-            emails: List[str] = await workflow.execute_activity(
-                "get_client_emails_activity",
-                args=(client_id,),
-                schedule_to_close_timeout=DB_TIMEOUT,
-            )
-            for to_email in emails:
-                dynamic_data = build_dynamic_data(client_id, inp)
-                # Send client final follow-up email (phase 3)
-                status_code = await workflow.execute_activity(
-                    "send_client_email_type3_activity",
-                    args=(to_email, dynamic_data),
-                    schedule_to_close_timeout=EMAIL_TIMEOUT,
-                )
-                results.append(ItemResult(client_id, "sent", f"phase3_client_email:{to_email}:{status_code}"))
+    # Build sends for every email in roster[section] of each client
+    def client_sends(self, client_ids, roster, section) -> List[Send]:
+        return [
+            Send(client_id, to_email)
+            for client_id in client_ids
+            for to_email in roster[section].get(str(client_id), [])
+        ]
 
-    # Phase 3: Send final follow-up emails to members
-    async def send_member_emails_phase3(self, client_ids, inp, results):
+    def record_clients_without_members(self, client_ids, roster, results):
         for client_id in client_ids:
-            member_emails: List[str] = await workflow.execute_activity(
-                "get_member_emails_activity",
-                args=(client_id,),
-                schedule_to_close_timeout=DB_TIMEOUT,
-            )
-            if not member_emails:
+            if not roster["members"].get(str(client_id)):
                 results.append(ItemResult(client_id, "skipped", "no ACTIVE members found for client_id"))
-                continue
-            for to_email in member_emails:
-                # Insert member account before sending invite
-                insert_result = await workflow.execute_activity(
-                    "insert_member_accounts_activity",
-                    args=(to_email, "cm7ai8xaa00006bd7bfhmskz3"),
-                    schedule_to_close_timeout=DB_TIMEOUT,
-                )
-                # Generate invite URL for member
-                invite_url = generate_invite_url(
-                    email=to_email,
-                    company_id="cm7ai8xaa00006bd7bfhmskz3",
-                )
-                dynamic_data = build_dynamic_data(client_id, inp, {"invite_url": invite_url})
-                # Send member final follow-up email (phase 3)
-                status_code = await workflow.execute_activity(
-                    "send_member_email_type3_activity",
-                    args=(to_email, dynamic_data),
-                    schedule_to_close_timeout=EMAIL_TIMEOUT,
-                )
-                results.append(ItemResult(
-                    client_id,
-                    "sent",
-                    f"phase3_member_email:{to_email}:{status_code} "
-                    f"(portal_id={insert_result['portal_id']}, mobile_id={insert_result['mobile_id']})"
-                ))
@@ -0,0 +1,247 @@
+import asyncio
+import dataclasses
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+from temporalio import workflow
+
+# Input data structure for batch processing
+@dataclass
+class BatchInput:
+    # sheet tab to read (source "sheets"); otherwise just the batch's name
+    tab_name: str
+    brand_name: Optional[str] = None
+    app_name: Optional[str] = None
+    appstore_link: Optional[str] = None
+    playstore_link: Optional[str] = None
+    website_portal: Optional[str] = None
+    cta_url: Optional[str] = None
+    launch_date: Optional[str] = None
+    # re-resolve ACTIVE members (only) right before phase 3
+    refresh_members_before_phase3: bool = True
+    # max activities in flight across a phase's parallel shards, split evenly
+    # between them (None -> DEFAULT_PHASE_CONCURRENCY per shard)
+    concurrency: Optional[int] = None
+    # recipients per SendGrid batch request (SendGrid caps this at 1,000)
+    email_batch_size: int = 500
+    # members per account-insert activity (two /crud inserts each by default)
+    account_batch_size: int = 50
+    # recipients per PhaseShardWorkflow child, and child shards run at once
+    shard_size: int = 5000
+    max_parallel_shards: int = 4
+    # send ledger key: re-run with the same batch_id to skip what was already
+    # delivered/provisioned (None -> the workflow id)
+    batch_id: Optional[str] = None
+    # resolve every recipient and return a BatchPlan without sending anything
+    dry_run: bool = False
+    # where the client ids come from: "sheets" (tab_name) or "file" (a .csv /
+    # .parquet at source_path, relative to the workers' BATCH_FILES_DIR)
+    source: str = "sheets"
+    source_path: Optional[str] = None
+    # email budget for the batch, split across its parallel shards (None: unpaced)
+    max_emails_per_minute: Optional[int] = None
+    # workflow sent this batch's BatchProgress as a "batch_progress" signal
+    # after every phase (set by MigrationWaveWorkflow for its batches)
+    progress_workflow_id: Optional[str] = None
+
+# Result for each processed item (client)
+@dataclass
+class ItemResult:
+    client_id: int
+    status: str
+    detail: str
+
+# Per-phase status counts plus a capped sample of failures; the full
+# per-recipient detail goes to the results artifact (app/activities/results.py)
+@dataclass
+class ResultSummary:
+    # {phase label: {status: count}}
+    counts: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    # first MAX_FAILURE_SAMPLES items whose status is not in OK_STATUSES
+    failures: List[ItemResult] = field(default_factory=list)
+
+    def add(self, phase: str, items: List[ItemResult]):
+        phase_counts = self.counts.setdefault(phase, {})
+        for item in items:
+            phase_counts[item.status] = phase_counts.get(item.status, 0) + 1
+            if item.status not in OK_STATUSES and len(self.failures) < MAX_FAILURE_SAMPLES:
+                self.failures.append(item)
+
+    def merge(self, other: "ResultSummary"):
+        for phase, phase_counts in other.counts.items():
+            mine = self.counts.setdefault(phase, {})
+            for status, count in phase_counts.items():
+                mine[status] = mine.get(status, 0) + count
+        self.failures.extend(other.failures[:MAX_FAILURE_SAMPLES - len(self.failures)])
+
+# What one phase would send in a dry run
+@dataclass
+class PhasePlan:
+    label: str
+    template: str
+    recipients: int
+    unique_recipients: int
+    # sends folded into another one to the same address (or a broker digest)
+    duplicates: int
+    sendgrid_requests: int
+
+# Dry-run output: the send plan and how long it would take at the current rate
+@dataclass
+class BatchPlan:
+    phases: List[PhasePlan] = field(default_factory=list)
+    total_emails: int = 0
+    total_requests: int = 0
+    # fixed waits between templates and phases
+    wait_seconds: float = 0.0
+    # SendGrid requests/sec of the email workers (None: unthrottled, no estimate)
+    send_rate: Optional[float] = None
+    estimated_seconds: Optional[float] = None
+
+# Result for the entire batch
+@dataclass
+class BatchResult:
+    tab_name: str
+    counts: Dict[str, Dict[str, int]]
+    failures: List[ItemResult]
+    # results artifact holding one line per ItemResult (see app/activities/results.py)
+    results_id: str
+    # set (and nothing sent) when BatchInput.dry_run
+    plan: Optional[BatchPlan] = None
+
+# Live progress of one BrokerNotifyWorkflow (its "progress" query)
+@dataclass
+class BatchProgress:
+    tab_name: str
+    # phase label being sent, or "resolving" / "done"
+    phase: str
+    # status counts of the phases finished so far
+    counts: Dict[str, Dict[str, int]]
+    workflow_id: str = ""
+
+# Input for MigrationWaveWorkflow: several batches under one budget
+@dataclass
+class WaveInput:
+    batches: List[BatchInput]
+    # batches (BrokerNotifyWorkflow children) running at once
+    max_parallel_batches: int = 2
+    # activities in flight across all running batches (None: each batch's own concurrency)
+    max_concurrent_activities: Optional[int] = None
+    # emails per minute across all running batches (None: unpaced)
+    max_emails_per_minute: Optional[int] = None
+
+# Outcome of one batch in a wave
+@dataclass
+class WaveBatchResult:
+    tab_name: str
+    workflow_id: str
+    # "pending", "running", "completed" or "failed"
+    status: str
+    result: Optional[BatchResult] = None
+    error: Optional[str] = None
+    # latest "batch_progress" signal from the batch while it runs
+    progress: Optional[BatchProgress] = None
+
+# MigrationWaveWorkflow result, and its "progress" query while running
+@dataclass
+class WaveProgress:
+    batches: List[WaveBatchResult]
+    # status counts summed over the batches: finished ones from their result,
+    # running (or failed) ones as of their last finished phase
+    counts: Dict[str, int]
+
+# One email to send: recipient plus its own template data; the batch-wide
+# fields are added in the shard by build_dynamic_data(client_id, inp, extra)
+@dataclass
+class Send:
+    client_id: int
+    to_email: str
+    extra: Optional[Dict[str, Any]] = None
+
+# Input for one PhaseShardWorkflow child (one template, a slice of recipients)
+@dataclass
+class ShardInput:
+    label: str
+    template: str
+    sends: List[Send]
+    inp: BatchInput
+    # phase 3 members: insert accounts and add an invite_url before sending
+    provision_accounts: bool = False
+    # continue-as-new checkpoint: a run continues with only the sends left
+    # (offset 0), `processed` counting those done by earlier runs, and their summary
+    offset: int = 0
+    processed: int = 0
+    summary: ResultSummary = field(default_factory=ResultSummary)
+
+# Task queues: workflows, and one per activity class so slow SendGrid sends,
+# Data API lookups and account inserts scale (and queue) independently
+WORKFLOW_TASK_QUEUE = "broker-notify-queue"
+LOOKUPS_TASK_QUEUE = "broker-notify-lookups"
+EMAILS_TASK_QUEUE = "broker-notify-emails"
+ACCOUNTS_TASK_QUEUE = "broker-notify-accounts"
+
+# Timeout settings for activities
+DB_TIMEOUT = workflow.timedelta(minutes=2)
+EMAIL_TIMEOUT = workflow.timedelta(minutes=3)
+ROSTER_TIMEOUT = workflow.timedelta(minutes=10)
+# per attempt (start-to-close) for account inserts, which heartbeat as they go
+ACCOUNTS_TIMEOUT = workflow.timedelta(minutes=5)
+ACCOUNTS_HEARTBEAT_TIMEOUT = workflow.timedelta(minutes=1)
+
+# How long member invite links stay valid
+INVITE_TTL = workflow.timedelta(days=14)
+
+# Activities a single phase shard keeps in flight at once (see BatchInput.concurrency)
+DEFAULT_PHASE_CONCURRENCY = 20
+
+# Statuses that are not sampled into ResultSummary.failures
+OK_STATUSES = ("sent", "already_sent", "deduplicated")
+MAX_FAILURE_SAMPLES = 100
+
+# Helper to build dynamic data for email templates
+def build_dynamic_data(client_id: int, inp: BatchInput, extra: Dict[str, Any] = None) -> Dict[str, Any]:
+    data = {
+        "client_id": client_id,
+        "brand_name": inp.brand_name,
+        "app_name": inp.app_name,
+        "appstore_link": inp.appstore_link,
+        "playstore_link": inp.playstore_link,
+        "website_portal": inp.website_portal,
+        "cta_url": inp.cta_url,
+        "launch_date": inp.launch_date,
+    }
+    if extra:
+        data.update(extra)
+    return data
+
+# ItemResult status for a SendGrid status code
+def send_status(status_code: int) -> str:
+    return "sent" if 200 <= status_code < 300 else "failed"
+
+# Run coroutine factories with at most `window` in flight; results keep input order
+async def run_bounded(factories: List[Callable[[], Awaitable[Any]]], window: int) -> List[Any]:
+    semaphore = asyncio.Semaphore(max(1, window))
+
+    async def run_one(factory):
+        async with semaphore:
+            return await factory()
+
+    return list(await asyncio.gather(*(run_one(f) for f in factories)))
+
+
+# Append items to the results artifact, `chunk_size` per write_results_activity
+# (each chunk is its own idempotent part); returns the activities scheduled
+async def write_results(results_id: str, part: str, phase: str, items: List[ItemResult],
+                        chunk_size: int, window: int) -> int:
+    size = max(1, chunk_size)
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+
+    def write(index, chunk):
+        lines = [{"phase": phase, **dataclasses.asdict(item)} for item in chunk]
+        return lambda: workflow.execute_activity(
+            "write_results_activity",
+            args=(results_id, f"{part}-{index}", lines),
+            task_queue=LOOKUPS_TASK_QUEUE,
+            schedule_to_close_timeout=DB_TIMEOUT,
+        )
+
+    await run_bounded([write(index, chunk) for index, chunk in enumerate(chunks)], window)
+    return len(chunks)
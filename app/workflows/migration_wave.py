@@ -0,0 +1,85 @@
+import dataclasses
+from typing import Dict, List
+from temporalio import workflow
+from temporalio.exceptions import ChildWorkflowError
+from app.workflows.common import (
+    BatchInput,
+    BatchProgress,
+    WaveBatchResult,
+    WaveInput,
+    WaveProgress,
+    run_bounded,
+)
+from app.workflows.broker_notify import BrokerNotifyWorkflow
+
+
+# Runs a migration wave: every batch as a BrokerNotifyWorkflow child, at most
+# max_parallel_batches at once, with the wave's activity and email budgets
+# split evenly over the batches running together. A failed batch is reported
+# and does not stop the others. Batches signal their counts after every phase,
+# so the progress query covers running batches too.
+@workflow.defn(name="MigrationWaveWorkflow")
+class MigrationWaveWorkflow:
+    def __init__(self):
+        self.batches: List[WaveBatchResult] = []
+
+    @workflow.run
+    async def run(self, wave: WaveInput) -> WaveProgress:
+        wave_id = workflow.info().workflow_id
+        self.batches = [
+            WaveBatchResult(tab_name=b.tab_name, workflow_id=f"{wave_id}-{index}", status="pending")
+            for index, b in enumerate(wave.batches)
+        ]
+        parallel = max(1, min(wave.max_parallel_batches, len(wave.batches)))
+
+        def start(index: int, batch: BatchInput):
+            batch = dataclasses.replace(self.budgeted(batch, wave, parallel), progress_workflow_id=wave_id)
+            return lambda: self.run_batch(self.batches[index], batch)
+
+        await run_bounded([start(index, b) for index, b in enumerate(wave.batches)], parallel)
+        return self.progress()
+
+    @workflow.query
+    def progress(self) -> WaveProgress:
+        counts: Dict[str, int] = {}
+        for batch in self.batches:
+            if batch.result is not None:
+                batch_counts = batch.result.counts
+            elif batch.progress is not None:
+                batch_counts = batch.progress.counts
+            else:
+                continue
+            for phase_counts in batch_counts.values():
+                for status, count in phase_counts.items():
+                    counts[status] = counts.get(status, 0) + count
+        return WaveProgress(batches=self.batches, counts=counts)
+
+    @workflow.signal
+    def batch_progress(self, progress: BatchProgress):
+        for batch in self.batches:
+            if batch.workflow_id == progress.workflow_id:
+                batch.progress = progress
+
+    # A batch's share of the wave budgets (only tightens what the batch already asks for)
+    def budgeted(self, batch: BatchInput, wave: WaveInput, parallel: int) -> BatchInput:
+        changes = {}
+        if wave.max_concurrent_activities:
+            share = max(1, wave.max_concurrent_activities // parallel)
+            changes["concurrency"] = min(batch.concurrency or share, share)
+        if wave.max_emails_per_minute:
+            share = max(1, wave.max_emails_per_minute // parallel)
+            changes["max_emails_per_minute"] = min(batch.max_emails_per_minute or share, share)
+        return dataclasses.replace(batch, **changes)
+
+    async def run_batch(self, entry: WaveBatchResult, batch: BatchInput):
+        entry.status = "running"
+        try:
+            entry.result = await workflow.execute_child_workflow(
+                BrokerNotifyWorkflow.run,
+                batch,
+                id=entry.workflow_id,
+            )
+            entry.status = "completed"
+        except ChildWorkflowError as e:
+            entry.status = "failed"
+            entry.error = str(e.cause or e)
@@ -0,0 +1,185 @@
+import dataclasses
+from collections import Counter
+from typing import List, Dict
+from temporalio import workflow
+from app.workflows.common import (
+    ItemResult,
+    ResultSummary,
+    ShardInput,
+    Send,
+    ACCOUNTS_TASK_QUEUE,
+    ACCOUNTS_HEARTBEAT_TIMEOUT,
+    ACCOUNTS_TIMEOUT,
+    DB_TIMEOUT,
+    INVITE_TTL,
+    EMAILS_TASK_QUEUE,
+    EMAIL_TIMEOUT,
+    DEFAULT_PHASE_CONCURRENCY,
+    build_dynamic_data,
+    run_bounded,
+    send_status,
+    write_results,
+)
+
+# Company the member accounts are provisioned under
+MEMBER_COMPANY_ID = "cm7ai8xaa00006bd7bfhmskz3"
+
+# Checkpoint (continue-as-new) once a run has scheduled this many activities
+MAX_ACTIVITIES_PER_RUN = 2000
+
+
+# Child workflow sending one template to one slice of a phase's recipients.
+# Keeps per-recipient activity history out of BrokerNotifyWorkflow and
+# continues-as-new when its own history gets large.
+@workflow.defn(name="PhaseShardWorkflow")
+class PhaseShardWorkflow:
+    def __init__(self):
+        self.activity_count = 0
+
+    @workflow.run
+    async def run(self, shard: ShardInput) -> ResultSummary:
+        summary = shard.summary
+        concurrency = shard.inp.concurrency or DEFAULT_PHASE_CONCURRENCY
+        window = concurrency * shard.inp.email_batch_size
+        rate = shard.inp.max_emails_per_minute
+        if rate:
+            # about a minute of sends per window, so pacing waits stay short
+            window = max(1, min(window, rate))
+
+        offset = shard.offset
+        while offset < len(shard.sends):
+            started = workflow.now()
+            part = shard.sends[offset:offset + window]
+            part_results = await self.process(part, shard)
+            self.record_progress(shard.label, part_results)
+            summary.add(shard.label, part_results)
+            # full detail goes to the results artifact, one part per window (the
+            # workflow id survives continue-as-new, so the part names stay unique)
+            self.activity_count += await write_results(
+                shard.inp.batch_id, f"{workflow.info().workflow_id}-{shard.processed + offset}", shard.label,
+                part_results, shard.inp.email_batch_size, concurrency,
+            )
+            offset += len(part)
+            if rate and offset < len(shard.sends):
+                await self.pace(started, len(part), rate)
+
+            if offset < len(shard.sends) and (
+                self.activity_count >= MAX_ACTIVITIES_PER_RUN
+                or workflow.info().is_continue_as_new_suggested()
+            ):
+                workflow.continue_as_new(dataclasses.replace(
+                    shard, sends=shard.sends[offset:], offset=0, processed=shard.processed + offset, summary=summary,
+                ))
+
+        return summary
+
+    # Hold the shard to `rate` emails/minute: wait out what is left of this window's share
+    async def pace(self, started, sent: int, rate: int):
+        remaining = workflow.timedelta(minutes=sent / rate) - (workflow.now() - started)
+        if remaining > workflow.timedelta(0):
+            await workflow.sleep(remaining)
+
+    # Phase progress metric (the workflow meter skips replays, so counts are not doubled)
+    def record_progress(self, label: str, results: List[ItemResult]):
+        counter = workflow.metric_meter().create_counter(
+            "member_migration_phase_emails", "Emails processed per phase and status"
+        )
+        for status, count in Counter(r.status for r in results).items():
+            counter.add(count, {"phase": label, "status": status})
+
+    async def process(self, sends: List[Send], shard: ShardInput) -> List[ItemResult]:
+        inp = shard.inp
+        if not shard.provision_accounts:
+            outcomes = await self.send_emails(shard.template, sends, shard)
+            return [
+                ItemResult(s.client_id, self.outcome_status(o), f"{shard.label}:{s.to_email}:{o['status_code']}")
+                for s, o in zip(sends, outcomes)
+            ]
+
+        # Insert member accounts (in bulk, one activity per chunk) before sending invites;
+        # each activity heartbeats per insert, so a slow Data API only needs it to keep moving
+        account_size = max(1, inp.account_batch_size)
+        account_chunks = [sends[i:i + account_size] for i in range(0, len(sends), account_size)]
+
+        def insert(chunk):
+            return lambda: workflow.execute_activity(
+                "insert_member_accounts_bulk_activity",
+                args=([(s.to_email, MEMBER_COMPANY_ID) for s in chunk], inp.batch_id, shard.label),
+                task_queue=ACCOUNTS_TASK_QUEUE,
+                start_to_close_timeout=ACCOUNTS_TIMEOUT,
+                heartbeat_timeout=ACCOUNTS_HEARTBEAT_TIMEOUT,
+            )
+        self.activity_count += len(account_chunks)
+        account_ids: Dict[str, Dict[str, str]] = {}
+        for chunk_ids in await run_bounded(
+            [insert(chunk) for chunk in account_chunks],
+            inp.concurrency or DEFAULT_PHASE_CONCURRENCY,
+        ):
+            account_ids.update(chunk_ids)
+
+        size = max(1, inp.email_batch_size)
+        chunks = [sends[i:i + size] for i in range(0, len(sends), size)]
+
+        # Sign invite links in bulk, off the workflow thread (iat/exp from workflow time)
+        now = workflow.now()
+        iat, exp = int(now.timestamp()), int((now + INVITE_TTL).timestamp())
+
+        def sign(chunk):
+            return lambda: workflow.execute_activity(
+                "generate_invite_links_activity",
+                args=([s.to_email for s in chunk], MEMBER_COMPANY_ID, iat, exp),
+                task_queue=ACCOUNTS_TASK_QUEUE,
+                schedule_to_close_timeout=DB_TIMEOUT,
+            )
+        self.activity_count += len(chunks)
+        invite_urls: List[str] = []
+        for links in await run_bounded(
+            [sign(chunk) for chunk in chunks],
+            inp.concurrency or DEFAULT_PHASE_CONCURRENCY,
+        ):
+            invite_urls.extend(links["base_url"] + token for token in links["tokens"])
+
+        invites = [
+            Send(s.client_id, s.to_email, {**(s.extra or {}), "invite_url": invite_url})
+            for s, invite_url in zip(sends, invite_urls)
+        ]
+        outcomes = await self.send_emails(shard.template, invites, shard)
+        return [
+            ItemResult(
+                s.client_id,
+                self.outcome_status(o),
+                f"{shard.label}:{s.to_email}:{o['status_code']} "
+                f"(portal_id={account_ids[s.to_email]['portal_id']}, mobile_id={account_ids[s.to_email]['mobile_id']})"
+            )
+            for s, o in zip(sends, outcomes)
+        ]
+
+    # "already_sent" when the send ledger had it from an earlier run of this batch
+    def outcome_status(self, outcome: dict) -> str:
+        return "already_sent" if outcome.get("ledger") else send_status(outcome["status_code"])
+
+    # Send as SendGrid batches of one template; one outcome per send, in order
+    async def send_emails(self, template: str, sends: List[Send], shard: ShardInput) -> List[dict]:
+        inp = shard.inp
+        size = max(1, min(inp.email_batch_size, 1000))
+        chunks = [sends[i:i + size] for i in range(0, len(sends), size)]
+
+        def send(chunk):
+            recipients = [
+                {"client_id": s.client_id, "to_email": s.to_email,
+                 "dynamic_data": build_dynamic_data(s.client_id, inp, s.extra)}
+                for s in chunk
+            ]
+            return lambda: workflow.execute_activity(
+                "send_email_batch_activity",
+                args=(template, recipients, inp.batch_id, shard.label),
+                task_queue=EMAILS_TASK_QUEUE,
+                schedule_to_close_timeout=EMAIL_TIMEOUT,
+            )
+
+        self.activity_count += len(chunks)
+        outcomes = await run_bounded(
+            [send(chunk) for chunk in chunks],
+            inp.concurrency or DEFAULT_PHASE_CONCURRENCY,
+        )
+        return [o for chunk_outcomes in outcomes for o in chunk_outcomes]
@@ -1,6 +1,10 @@
 from temporalio import workflow
 from typing import Dict, Any
-from app.utils.invite_links import generate_invite_url
+
+# jwt/cryptography cannot be re-imported inside the workflow sandbox
+with workflow.unsafe.imports_passed_through():
+    from app.utils.invite_links import generate_invite_url
+from app.workflows.common import EMAILS_TASK_QUEUE
 
 EMAIL_TIMEOUT = workflow.timedelta(minutes=3)
 
@@ -29,6 +33,7 @@ class TestSingleMemberWorkflow:
         status_code = await workflow.execute_activity(
             "send_member_email_type3_activity",
             args=(test_email, dynamic_data),
+            task_queue=EMAILS_TASK_QUEUE,
             schedule_to_close_timeout=EMAIL_TIMEOUT,
         )
 
@@ -0,0 +1,162 @@
+"""
+bench/fake_services.py
+
+In-process stand-ins for the Data API (/select, /crud) and SendGrid
+(/v3/mail/send), plus a synthetic N clients x M members dataset.
+
+Both fakes add a configurable latency per request and fail a configurable
+fraction of requests with a 503, and count every call so the benchmark can
+report HTTP traffic per endpoint/table.
+"""
+
+import gzip
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+def build_dataset(clients: int, members_per_client: int, active_ratio: float = 0.9, seed: int = 7) -> Dict[str, List[Dict[str, Any]]]:
+    """Synthetic tables: every client has 1-2 brokers, 2 contacts and `members_per_client` members."""
+    rng = random.Random(seed)
+    broker_count = max(1, clients // 5)
+    tables: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+    for bid in range(1, broker_count + 1):
+        tables["brokers"].append({"id": bid, "email": f"broker{bid}@bench.test"})
+
+    member_id = 0
+    for cid in range(1, clients + 1):
+        tables["clients"].append({"id": cid, "client_name": f"Client {cid}"})
+        for bid in rng.sample(range(1, broker_count + 1), k=min(broker_count, rng.randint(1, 2))):
+            tables["clients_to_brokers"].append({"client_id": cid, "broker_id": bid})
+        for n in range(2):
+            tables["client_contacts"].append({"client_id": cid, "email": f"contact{n}.c{cid}@bench.test"})
+        for n in range(members_per_client):
+            member_id += 1
+            tables["members"].append({"id": member_id, "client_id": cid, "email": f"m{member_id}@bench.test"})
+            status = "ACTIVE" if rng.random() < active_ratio else "INACTIVE"
+            tables["current_member_status_view"].append({"member_id": member_id, "member_status": status})
+    return dict(tables)
+
+
+class _Index:
+    """Per-(table, column) hash index so IN-filtered selects stay cheap on big datasets."""
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]]):
+        self.tables = tables
+        self._indexes: Dict[tuple, Dict[Any, List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, table: str, column: str):
+        key = (table, column)
+        with self._lock:
+            if key not in self._indexes:
+                index = defaultdict(list)
+                for row in self.tables.get(table, []):
+                    index[str(row.get(column))].append(row)
+                self._indexes[key] = index
+            return self._indexes[key]
+
+    def select(self, table: str, columns: List[str], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        rows = self.tables.get(table, [])
+        items = list(filters.items())
+        if items:
+            column, value = items[0]
+            values = value if isinstance(value, list) else [value]
+            index = self._index(table, column)
+            rows = [r for v in dict.fromkeys(str(v) for v in values) for r in index.get(v, [])]
+            for column, value in items[1:]:
+                values = {str(v) for v in (value if isinstance(value, list) else [value])}
+                rows = [r for r in rows if str(r.get(column)) in values]
+        return [{c: r.get(c) for c in columns} for r in rows]
+
+
+class FakeServices:
+    """Runs the fake Data API and SendGrid on one local port."""
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]], latency_ms: float = 0.0, error_rate: float = 0.0, seed: int = 11):
+        self.index = _Index(tables)
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.sends: List[Dict[str, Any]] = []  # {"template_id", "recipients", "at"}
+        self.inserted_rows = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "FakeServices":
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    raw = gzip.decompress(raw)
+                status, body, headers = services.handle(self.path.split("?")[0], json.loads(raw or b"{}"))
+                out = json.dumps(body).encode("utf-8") if body is not None else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def handle(self, path: str, body: Dict[str, Any]):
+        if path == "/select":
+            key = f"select:{body.get('table')}"
+        elif path == "/crud":
+            key = f"crud:{body.get('table')}"
+        elif path == "/v3/mail/send":
+            key = "sendgrid:mail_send"
+        else:
+            return 404, {"error": "not found"}, {}
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        with self._lock:
+            self.calls[key] += 1
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.errors[key] += 1
+        if failed:
+            return 503, {"error": "injected failure"}, {}
+
+        if path == "/select":
+            return 200, {"rows": self.index.select(body["table"], body.get("columns", []), body.get("filters") or {})}, {}
+        if path == "/crud":
+            # "rows" is the unconfirmed multi-row shape behind ACCOUNTS_MULTI_ROW_INSERTS
+            rows = body.get("rows") or [body.get("fields")]
+            with self._lock:
+                self.inserted_rows += len(rows)
+            return 200, {"inserted": len(rows)}, {}
+
+        recipients = [to["email"] for p in body.get("personalizations", []) for to in p.get("to", [])]
+        with self._lock:
+            self.sends.append({"template_id": body.get("template_id"), "recipients": recipients, "at": time.time()})
+        return 202, None, {"X-RateLimit-Remaining": "100000", "X-RateLimit-Reset": str(int(time.time()) + 60)}
@@ -0,0 +1,192 @@
+"""
+bench/run.py
+
+End-to-end throughput benchmark for BrokerNotifyWorkflow.
+
+Runs the real workflows and activities on an in-process worker against a
+local Temporal test server (time-skipping, so the waits between phases cost
+nothing). The Data API and SendGrid are replaced by bench/fake_services.py,
+and the batch is a CSV of the synthetic dataset's client ids, read through
+the file batch source.
+
+Reports the send span per phase (first to last SendGrid request of its
+templates, so lookups, account inserts and invite signing before the first
+send are not counted), HTTP calls per endpoint/table and emails/sec.
+
+Usage:
+    python -m bench.run --clients 50 --members 200 --latency-ms 20
+    python -m bench.run --clients 200 --members 250 --error-rate 0.01 --concurrency 40
+    python -m bench.run --temporal-target localhost:7233   # use a running dev server instead
+"""
+
+import argparse
+import asyncio
+import csv
+import contextlib
+import os
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fake_services import FakeServices, build_dataset
+
+# SendGrid template id per batch template key; the fake SendGrid sees these ids
+TEMPLATE_IDS = {
+    "SENDGRID_BROKER_TEMPLATE_1": "broker_type1",
+    "SENDGRID_BROKER_TEMPLATE_2": "broker_type2",
+    "SENDGRID_CLIENT_TEMPLATE_1": "client_type1",
+    "SENDGRID_CLIENT_TEMPLATE_2": "client_type2",
+    "SENDGRID_CLIENT_TEMPLATE_3": "client_type3",
+    "SENDGRID_MEMBER_TEMPLATE_1": "member_type1",
+    "SENDGRID_MEMBER_TEMPLATE_2": "member_type2",
+    "SENDGRID_MEMBER_TEMPLATE_3": "member_type3",
+}
+
+PHASES = {
+    "phase1": ["broker_type1", "client_type1", "member_type1"],
+    "phase2": ["broker_type2", "client_type2", "member_type2"],
+    "phase3": ["client_type3", "member_type3"],
+}
+
+
+def configure_env(services: FakeServices, args):
+    """Point app.settings at the fakes. Must run before any app.* import."""
+    scratch = tempfile.mkdtemp(prefix="bench-")
+    os.environ.update({
+        "TEMPORAL_HOST": args.temporal_target or "localhost:7233",
+        "TEMPORAL_NAMESPACE": "default",
+        "TEMPORAL_API_KEY": "bench",
+        "DATA_API_BASE_URL": services.base_url,
+        "DATA_API_DB_KEY": "bench",
+        "DATA_API_ACCOUNTS_DB_KEY": "bench-accounts",
+        "AUTH_STATIC_BEARER_TOKEN": "bench",
+        "SHEET_ID": "bench",
+        "SENDGRID_API_KEY": "SG.bench",
+        "SENDGRID_FROM_EMAIL": "bench@bench.test",
+        "SENDGRID_API_HOST": services.base_url,
+        "SENDGRID_MAX_REQUESTS_PER_SEC": str(args.sendgrid_rps),
+        "INVITE_SECRET_KEY": "bench",
+        "INVITE_ORIGIN": "https://bench.test",
+        "WORKER_LOOKUPS_CONCURRENCY": str(args.threads),
+        "WORKER_EMAILS_CONCURRENCY": str(args.threads),
+        "WORKER_ACCOUNTS_CONCURRENCY": str(args.threads),
+        "ACCOUNTS_MULTI_ROW_INSERTS": str(args.multi_row_inserts),
+        # keep the send ledger, results artifacts and batch file out of the working tree
+        "SEND_LEDGER_PATH": os.path.join(scratch, "send_ledger.sqlite3"),
+        "RESULTS_DIR": os.path.join(scratch, "results"),
+        "BATCH_FILES_DIR": scratch,
+        **TEMPLATE_IDS,
+    })
+
+
+def report(services: FakeServices, result, wall: float, clients: int, members: int):
+    by_template = defaultdict(list)
+    for send in services.sends:
+        by_template[send["template_id"]].append(send)
+
+    print(f"\nBrokerNotifyWorkflow benchmark: {clients} clients x {members} members, wall clock {wall:.2f}s")
+    print("\nSend span per phase (first to last SendGrid request only, not the whole phase):")
+    total_emails = 0
+    for phase, templates in PHASES.items():
+        sends = [s for t in templates for s in by_template.get(t, [])]
+        emails = sum(len(s["recipients"]) for s in sends)
+        total_emails += emails
+        if not sends:
+            print(f"  {phase}: no sends")
+            continue
+        span = max(s["at"] for s in sends) - min(s["at"] for s in sends)
+        detail = ", ".join(f"{t}={sum(len(s['recipients']) for s in by_template.get(t, []))}" for t in templates)
+        print(f"  {phase}: send span {span:7.2f}s  {emails} emails in {len(sends)} requests ({detail})")
+
+    print("\nHTTP calls:")
+    for key, count in sorted(services.calls.items()):
+        errors = services.errors.get(key, 0)
+        print(f"  {key:40s} {count:6d}" + (f"  ({errors} injected errors)" if errors else ""))
+    print(f"  account rows inserted: {services.inserted_rows}")
+
+    statuses = Counter()
+    for counts in result.counts.values():
+        statuses.update(counts)
+    print(f"\nResult statuses: {dict(statuses)}")
+    print(f"Emails sent: {total_emails}  ->  {total_emails / wall:.1f} emails/sec overall")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--members", type=int, default=100, help="members per client")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="added latency per fake HTTP request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake requests failing with 503")
+    parser.add_argument("--concurrency", type=int, default=None, help="BatchInput.concurrency")
+    parser.add_argument("--email-batch-size", type=int, default=500)
+    parser.add_argument("--shard-size", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=20, help="activity threads per worker role")
+    parser.add_argument("--multi-row-inserts", action="store_true", help="multi-row /crud account inserts")
+    parser.add_argument("--sendgrid-rps", type=float, default=0, help="SendGrid rate limit; 0 disables it")
+    parser.add_argument("--temporal-target", default=None, help="use a running Temporal server instead of the test server")
+    args = parser.parse_args()
+
+    tables = build_dataset(args.clients, args.members)
+    services = FakeServices(tables, latency_ms=args.latency_ms, error_rate=args.error_rate).start()
+    configure_env(services, args)
+
+    # app imports read settings, so they come after configure_env
+    from temporalio.client import Client
+    from temporalio.testing import WorkflowEnvironment
+    import worker
+    from app.utils.temporal_client import data_converter
+    from app.workflows.broker_notify import BrokerNotifyWorkflow, BatchInput
+
+    with open(os.path.join(os.environ["BATCH_FILES_DIR"], "batch.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Client id", "Client Name"])
+        writer.writerows((c["id"], c["client_name"]) for c in tables["clients"])
+
+    if args.temporal_target:
+        env = None
+        client = await Client.connect(args.temporal_target, data_converter=data_converter())
+    else:
+        env = await WorkflowEnvironment.start_time_skipping(data_converter=data_converter())
+        client = env.client
+
+    # every role in this process, each with its own executor (as `worker.py` does)
+    executors = {
+        role: ThreadPoolExecutor(max_workers=worker.role_concurrency(role), thread_name_prefix=role)
+        for role in worker.ACTIVITY_ROLES
+    }
+    workers = [worker.build_worker(client, "workflows")] + [
+        worker.build_worker(client, role, executor)
+        for role, executor in executors.items()
+    ]
+    try:
+        async with contextlib.AsyncExitStack() as stack:
+            for w in workers:
+                await stack.enter_async_context(w)
+            started = time.time()
+            result = await client.execute_workflow(
+                BrokerNotifyWorkflow.run,
+                BatchInput(
+                    tab_name="bench",
+                    source="file",
+                    source_path="batch.csv",
+                    concurrency=args.concurrency,
+                    email_batch_size=args.email_batch_size,
+                    shard_size=args.shard_size,
+                ),
+                id=f"bench-{uuid.uuid4().hex[:8]}",
+                task_queue=worker.TASK_QUEUE,
+            )
+            wall = time.time() - started
+        report(services, result, wall, args.clients, args.members)
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+        services.stop()
+        if env:
+            await env.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
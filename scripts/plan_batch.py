@@ -0,0 +1,62 @@
+"""
+scripts/plan_batch.py
+
+Dry run of BrokerNotifyWorkflow for one sheet tab: resolves every recipient
+with the bulk lookups and prints the send plan, without sending anything or
+inserting accounts.
+
+Prints:
+- recipients, distinct addresses, duplicates and SendGrid requests per phase/template
+- rows skipped before any phase (invalid / unknown client ids, no broker mapping, ...)
+- the estimated duration at the email workers' SendGrid rate (waits between phases included)
+
+Usage:
+- Make sure the worker is running (workflows, lookups and emails roles).
+- Run: `python scripts/plan_batch.py "Batch 1"`
+"""
+
+import asyncio
+import sys
+import uuid
+from app.utils.temporal_client import connect
+from app.workflows.broker_notify import BrokerNotifyWorkflow, BatchInput
+
+
+async def main():
+    tab_name = sys.argv[1] if len(sys.argv) > 1 else "Batch 1"
+
+    # 1. connect to Temporal Cloud
+    client = await connect()
+
+    # 2. run the workflow in dry-run mode and wait for the plan
+    workflow_id = f"plan-{uuid.uuid4().hex[:6]}"
+    result = await client.execute_workflow(
+        BrokerNotifyWorkflow.run,
+        BatchInput(tab_name=tab_name, dry_run=True),
+        id=workflow_id,
+        task_queue="broker-notify-queue",
+    )
+    plan = result.plan
+
+    # 3. print the plan
+    print(f"Send plan for tab {tab_name!r} (workflow {workflow_id})\n")
+    print(f"  {'phase':22s} {'template':14s} {'recipients':>10s} {'unique':>8s} {'dupes':>7s} {'requests':>9s}")
+    for p in plan.phases:
+        print(f"  {p.label:22s} {p.template:14s} {p.recipients:10d} {p.unique_recipients:8d} {p.duplicates:7d} {p.sendgrid_requests:9d}")
+    print(f"\n  total: {plan.total_emails} emails in {plan.total_requests} SendGrid requests")
+
+    print("\nSkipped / not found:")
+    for phase, counts in result.counts.items():
+        print(f"  {phase}: {counts}")
+    for item in result.failures:
+        print(f"  client_id={item.client_id}, status={item.status}, detail={item.detail}")
+
+    if plan.estimated_seconds is None:
+        print(f"\nEstimated duration: SendGrid pacing is off; {plan.wait_seconds:.0f}s of fixed waits plus send time")
+    else:
+        print(f"\nEstimated duration: {plan.estimated_seconds / 60:.1f} min at {plan.send_rate:g} SendGrid requests/sec "
+              f"({plan.wait_seconds:.0f}s of it fixed waits between phases)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
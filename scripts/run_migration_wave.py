@@ -0,0 +1,76 @@
+"""
+scripts/run_migration_wave.py
+
+Runs several sheet tabs as one MigrationWaveWorkflow: each tab becomes a
+BrokerNotifyWorkflow child, at most --parallel at once, with the activity
+and email budgets shared across the running batches.
+
+Prints the wave's aggregate progress (its "progress" query) every
+--poll-seconds until it finishes, then each batch's outcome.
+
+Usage:
+- Make sure the worker is running (all roles).
+- Run: `python scripts/run_migration_wave.py "Batch 1" "Batch 2" "Batch 3" --parallel 2 --emails-per-minute 3000`
+"""
+
+import argparse
+import asyncio
+import uuid
+from app.utils.temporal_client import connect
+from app.workflows.common import BatchInput, WaveInput
+from app.workflows.migration_wave import MigrationWaveWorkflow
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("tabs", nargs="+", help="sheet tabs, one batch each")
+    parser.add_argument("--parallel", type=int, default=2, help="batches running at once")
+    parser.add_argument("--max-activities", type=int, default=None, help="activities in flight across the wave")
+    parser.add_argument("--emails-per-minute", type=int, default=None, help="email budget across the wave")
+    parser.add_argument("--poll-seconds", type=float, default=30)
+    args = parser.parse_args()
+
+    # 1. connect to Temporal Cloud
+    client = await connect()
+
+    # 2. start the wave
+    workflow_id = f"migration-wave-{uuid.uuid4().hex[:6]}"
+    handle = await client.start_workflow(
+        MigrationWaveWorkflow.run,
+        WaveInput(
+            batches=[BatchInput(tab_name=tab) for tab in args.tabs],
+            max_parallel_batches=args.parallel,
+            max_concurrent_activities=args.max_activities,
+            max_emails_per_minute=args.emails_per_minute,
+        ),
+        id=workflow_id,
+        task_queue="broker-notify-queue",
+    )
+    print(f"Wave started: {workflow_id}")
+
+    # 3. report aggregate progress until it finishes
+    result_task = asyncio.ensure_future(handle.result())
+    while not result_task.done():
+        await asyncio.wait([result_task], timeout=args.poll_seconds)
+        if result_task.done():
+            break
+        progress = await handle.query(MigrationWaveWorkflow.progress)
+        states = [
+            f"{b.tab_name}={b.status}" + (f" ({b.progress.phase})" if b.status == "running" and b.progress else "")
+            for b in progress.batches
+        ]
+        print(f"  {', '.join(states)}  emails so far (finished phases): {progress.counts}")
+
+    # 4. print each batch's outcome
+    result = result_task.result()
+    print("\nWave finished")
+    for batch in result.batches:
+        print(f"  {batch.tab_name} ({batch.workflow_id}): {batch.status}" + (f" - {batch.error}" if batch.error else ""))
+        if batch.result:
+            for phase, counts in batch.result.counts.items():
+                print(f"    {phase}: {counts}")
+    print(f"\nTotals: {result.counts}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
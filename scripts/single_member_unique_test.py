@@ -1,16 +1,10 @@
 import asyncio
-from temporalio.client import Client
-from app.settings import settings
+from app.utils.temporal_client import connect
 from app.workflows.single_member_test import TestSingleMemberWorkflow
 import uuid
 
 async def main():
-    client = await Client.connect(
-        target_host=settings.TEMPORAL_HOST,
-        namespace=settings.TEMPORAL_NAMESPACE,
-        api_key=settings.TEMPORAL_API_KEY,
-        tls=True,
-    )
+    client = await connect()
 
     handle = await client.start_workflow(
         TestSingleMemberWorkflow.run,
@@ -11,7 +11,7 @@ What it verifies:
    - fetches broker emails via brokers table
    - deduplicates by broker
    - sends one email per broker (SendGrid activity)
-3. The workflow returns a BatchResult with detailed ItemResult statuses.
+3. The workflow returns a BatchResult with per-phase status counts and a failure sample.
 
 Usage:
 - Make sure your worker is running and has registered activities/workflows.
@@ -21,19 +21,13 @@ Usage:
 
 import asyncio
 import uuid
-from temporalio.client import Client
-from app.settings import settings
+from app.utils.temporal_client import connect
 from app.workflows.broker_notify import BrokerNotifyWorkflow, BatchInput
 
 
 async def main():
     # 1. connect to Temporal Cloud
-    client = await Client.connect(
-        target_host=settings.TEMPORAL_HOST,
-        namespace=settings.TEMPORAL_NAMESPACE,
-        api_key=settings.TEMPORAL_API_KEY,
-        tls=True,
-    )
+    client = await connect()
 
     # 2. generate unique workflow id
     workflow_id = f"broker-notify-{uuid.uuid4().hex[:6]}"
@@ -61,9 +55,13 @@ async def main():
     print("Workflow finished")
     print("Workflow ID:", workflow_id)
     print("Batch tab:", result.tab_name)
-    print("Processed results:")
-    for item in result.processed:
+    print("Results per phase:")
+    for phase, counts in result.counts.items():
+        print(f"  {phase}: {counts}")
+    print(f"\nFailures (first {len(result.failures)}):")
+    for item in result.failures:
         print(f"  client_id={item.client_id}, status={item.status}, detail={item.detail}")
+    print("\nPer-recipient results: app.activities.results.read_results(%r)" % result.results_id)
 
 
 if __name__ == "__main__":
@@ -8,7 +8,7 @@ This script tests the full BrokerNotifyWorkflow:
 4. Sends client notification emails (Client Template 1).
 5. Waits 2 minutes.
 6. Sends member notification emails (Member Template 1).
-7. Returns a BatchResult with ItemResults for each stage.
+7. Returns a BatchResult with status counts for each stage.
 
 Usage:
     python scripts/test_broker_client_member_notifications.py
@@ -19,19 +19,13 @@ Make sure:
 
 import asyncio
 import uuid
-from temporalio.client import Client
-from app.settings import settings
+from app.utils.temporal_client import connect
 from app.workflows.broker_notify import BrokerNotifyWorkflow, BatchInput
 
 
 async def main():
     # 1. connect to Temporal Cloud
-    client = await Client.connect(
-        target_host=settings.TEMPORAL_HOST,
-        namespace=settings.TEMPORAL_NAMESPACE,
-        api_key=settings.TEMPORAL_API_KEY,
-        tls=True,
-    )
+    client = await connect()
 
     # 2. unique workflow id for this run
     workflow_id = f"broker-client-member-test-{uuid.uuid4().hex[:6]}"
@@ -59,9 +53,13 @@ async def main():
     print("\n Workflow finished")
     print("Workflow ID:", workflow_id)
     print("Batch tab:", result.tab_name)
-    print("\nProcessed results:")
-    for item in result.processed:
+    print("\nResults per phase:")
+    for phase, counts in result.counts.items():
+        print(f"  {phase}: {counts}")
+    print(f"\nFailures (first {len(result.failures)}):")
+    for item in result.failures:
         print(f"  client_id={item.client_id}, status={item.status}, detail={item.detail}")
+    print("\nPer-recipient results: app.activities.results.read_results(%r)" % result.results_id)
 
 
 if __name__ == "__main__":
@@ -22,19 +22,13 @@ Usage:
 
 import asyncio
 import uuid
-from temporalio.client import Client
-from app.settings import settings
+from app.utils.temporal_client import connect
 from app.workflows.broker_notify import BrokerNotifyWorkflow, BatchInput
 
 
 async def main():
     # 1. Connect to Temporal Cloud
-    client = await Client.connect(
-        target_host=settings.TEMPORAL_HOST,
-        namespace=settings.TEMPORAL_NAMESPACE,
-        api_key=settings.TEMPORAL_API_KEY,
-        tls=True,
-    )
+    client = await connect()
 
     # 2. Generate unique workflow ID
     workflow_id = f"broker-client-member-phase2-{uuid.uuid4().hex[:6]}"
@@ -68,9 +62,13 @@ async def main():
     print("Workflow ID:", workflow_id)
     print("Batch tab:", result.tab_name)
 
-    print("\nProcessed results:")
-    for item in result.processed:
+    print("\nResults per phase:")
+    for phase, counts in result.counts.items():
+        print(f"  {phase}: {counts}")
+    print(f"\nFailures (first {len(result.failures)}):")
+    for item in result.failures:
         print(f"  client_id={item.client_id}, status={item.status}, detail={item.detail}")
+    print("\nPer-recipient results: app.activities.results.read_results(%r)" % result.results_id)
 
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ This script tests the full BrokerNotifyWorkflow:
 2. Sends broker notification emails (using Broker Template 1).
 3. Waits 2 minutes.
 4. Sends client notification emails (using Client Template 1).
-5. Returns a BatchResult with ItemResults for each client (and email).
+5. Returns a BatchResult with status counts per phase (per-email detail in the results artifact).
 
 Usage:
     python scripts/test_broker_client_notifications.py
@@ -17,19 +17,13 @@ Make sure:
 
 import asyncio
 import uuid
-from temporalio.client import Client
-from app.settings import settings
+from app.utils.temporal_client import connect
 from app.workflows.broker_notify import BrokerNotifyWorkflow, BatchInput
 
 
 async def main():
     # 1. connect to Temporal Cloud
-    client = await Client.connect(
-        target_host=settings.TEMPORAL_HOST,
-        namespace=settings.TEMPORAL_NAMESPACE,
-        api_key=settings.TEMPORAL_API_KEY,
-        tls=True,
-    )
+    client = await connect()
 
     # 2. unique workflow id
     workflow_id = f"broker-client-test-{uuid.uuid4().hex[:6]}"
@@ -57,9 +51,13 @@ async def main():
     print("\n Workflow finished")
     print("Workflow ID:", workflow_id)
     print("Batch tab:", result.tab_name)
-    print("\nProcessed results:")
-    for item in result.processed:
+    print("\nResults per phase:")
+    for phase, counts in result.counts.items():
+        print(f"  {phase}: {counts}")
+    print(f"\nFailures (first {len(result.failures)}):")
+    for item in result.failures:
         print(f"  client_id={item.client_id}, status={item.status}, detail={item.detail}")
+    print("\nPer-recipient results: app.activities.results.read_results(%r)" % result.results_id)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 import asyncio
-from temporalio.client import Client
+from app.utils.temporal_client import connect
 from uuid import uuid4
 
 from app.settings import settings
@@ -13,12 +13,7 @@ print("DEBUG: TEMPORAL_API_KEY =", repr(settings.TEMPORAL_API_KEY))
 
 
 async def main():
-    client = await Client.connect(
-        target_host=settings.TEMPORAL_HOST,
-        namespace=settings.TEMPORAL_NAMESPACE,
-        api_key=settings.TEMPORAL_API_KEY,   # not a JWT, it's the API key
-        tls=True,
-    )
+    client = await connect()
 
 
 
@@ -1,24 +1,39 @@
+import argparse
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from temporalio.client import Client
 from temporalio.worker import Worker
 
 from app.settings import settings
+from app.activities import data_api
+from app.utils.http_client import close_data_api_client, close_sendgrid_client
+from app.utils.metrics import ActivityMetricsInterceptor, configure_runtime
+from app.utils.temporal_client import connect
 from app.workflows.broker_notify import BrokerNotifyWorkflow
+from app.workflows.phase_shard import PhaseShardWorkflow
 from app.workflows.single_member_test import TestSingleMemberWorkflow
-
-print("DEBUG: SENDGRID_API_KEY prefix:", settings.SENDGRID_API_KEY[:8])
-print("DEBUG: FROM_EMAIL:", settings.SENDGRID_FROM_EMAIL)
-
+from app.workflows.migration_wave import MigrationWaveWorkflow
+from app.workflows.common import (
+    WORKFLOW_TASK_QUEUE,
+    LOOKUPS_TASK_QUEUE,
+    EMAILS_TASK_QUEUE,
+    ACCOUNTS_TASK_QUEUE,
+)
 
 from app.activities.definitions import (
     # sheets + lookups
     read_rows_activity,
     get_broker_ids_for_client_activity,
     get_broker_email_activity,
+    get_broker_mapping_activity,
     get_client_emails_activity,
     get_member_emails_activity,
     get_all_client_ids_activity,
+    validate_client_ids_activity,
     get_client_name_activity, 
+    resolve_roster_activity,
+    refresh_roster_members_activity,
 
     # broker emails
     send_broker_email_type1_activity,
@@ -33,57 +48,140 @@ from app.activities.definitions import (
     send_member_email_type1_activity,
     send_member_email_type2_activity,
     send_member_email_type3_activity,
+    send_email_batch_activity,
+    get_send_rate_activity,
 
     # accounts
     insert_member_accounts_activity,   
+    insert_member_accounts_bulk_activity,
+    generate_invite_links_activity,
+
+    # results
+    write_results_activity,
 )
 
 
-async def main():
-    client = await Client.connect(
-        target_host=settings.TEMPORAL_HOST,
-        namespace=settings.TEMPORAL_NAMESPACE,
-        api_key=settings.TEMPORAL_API_KEY,
-        tls=True,
-    )
+# Worker roles; a process runs one or several (python worker.py --roles emails)
+ROLES = ("workflows", "lookups", "emails", "accounts")
+
+TASK_QUEUE = WORKFLOW_TASK_QUEUE
 
-    task_queue = "broker-notify-queue"
+WORKFLOWS = [BrokerNotifyWorkflow, PhaseShardWorkflow, MigrationWaveWorkflow, TestSingleMemberWorkflow]
 
-    worker = Worker(
+# sheets, Data API lookups and the results artifact
+LOOKUP_ACTIVITIES = [
+    read_rows_activity,
+    get_broker_ids_for_client_activity,
+    get_broker_email_activity,
+    get_broker_mapping_activity,
+    get_client_emails_activity,
+    get_member_emails_activity,
+    get_all_client_ids_activity,
+    validate_client_ids_activity,
+    get_client_name_activity,
+    resolve_roster_activity,
+    refresh_roster_members_activity,
+    write_results_activity,
+]
+
+EMAIL_ACTIVITIES = [
+    send_broker_email_type1_activity,
+    send_broker_email_type2_activity,
+    send_client_email_type1_activity,
+    send_client_email_type2_activity,
+    send_client_email_type3_activity,
+    send_member_email_type1_activity,
+    send_member_email_type2_activity,
+    send_member_email_type3_activity,
+    send_email_batch_activity,
+    get_send_rate_activity,
+]
+
+ACCOUNT_ACTIVITIES = [
+    insert_member_accounts_activity,
+    insert_member_accounts_bulk_activity,
+    generate_invite_links_activity,
+]
+
+ACTIVITIES = LOOKUP_ACTIVITIES + EMAIL_ACTIVITIES + ACCOUNT_ACTIVITIES
+
+# role -> (task queue, activities, concurrency setting)
+ACTIVITY_ROLES = {
+    "lookups": (LOOKUPS_TASK_QUEUE, LOOKUP_ACTIVITIES, "WORKER_LOOKUPS_CONCURRENCY"),
+    "emails": (EMAILS_TASK_QUEUE, EMAIL_ACTIVITIES, "WORKER_EMAILS_CONCURRENCY"),
+    "accounts": (ACCOUNTS_TASK_QUEUE, ACCOUNT_ACTIVITIES, "WORKER_ACCOUNTS_CONCURRENCY"),
+}
+
+
+def build_worker(client: Client, role: str, activity_executor: Optional[ThreadPoolExecutor] = None, activities=None) -> Worker:
+    """
+    Worker for one role. Activity roles need `activity_executor`, sized to the
+    role's concurrency (see role_concurrency); `activities` replaces the role's
+    list (the benchmark swaps in fakes).
+    """
+    if role == "workflows":
+        return Worker(client, task_queue=WORKFLOW_TASK_QUEUE, workflows=WORKFLOWS)
+    task_queue, role_activities, _ = ACTIVITY_ROLES[role]
+    return Worker(
         client,
         task_queue=task_queue,
-        workflows=[BrokerNotifyWorkflow, TestSingleMemberWorkflow],
-        activities=[
-            # sheets + lookups
-            read_rows_activity,
-            get_broker_ids_for_client_activity,
-            get_broker_email_activity,
-            get_client_emails_activity,
-            get_member_emails_activity,
-            get_all_client_ids_activity,
-            get_client_name_activity, 
-
-            # broker emails
-            send_broker_email_type1_activity,
-            send_broker_email_type2_activity,
-
-            # client emails
-            send_client_email_type1_activity,
-            send_client_email_type2_activity,
-            send_client_email_type3_activity,
-
-            # member emails
-            send_member_email_type1_activity,
-            send_member_email_type2_activity,
-            send_member_email_type3_activity,
-
-            # accounts
-            insert_member_accounts_activity,   #  NEW
-        ],
+        activity_executor=activity_executor,
+        max_concurrent_activities=role_concurrency(role),
+        activities=activities if activities is not None else role_activities,
+        interceptors=[ActivityMetricsInterceptor()],
     )
 
-    print("Worker started on task queue:", task_queue)
-    await worker.run()
+
+def role_concurrency(role: str) -> int:
+    return getattr(settings, ACTIVITY_ROLES[role][2])
+
+
+def parse_roles(value: str) -> List[str]:
+    roles = [r.strip() for r in value.split(",") if r.strip()]
+    unknown = set(roles) - set(ROLES)
+    if unknown or not roles:
+        raise argparse.ArgumentTypeError(f"roles must be a comma-separated subset of {','.join(ROLES)}")
+    return roles
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Temporal worker for the member migration.")
+    parser.add_argument("--roles", type=parse_roles, default=list(ROLES),
+                        help=f"comma-separated roles to run in this process (default: {','.join(ROLES)})")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="load the directory tables into the lookups role's cache before polling")
+    args = parser.parse_args()
+
+    # must run before the client exists so SDK and app metrics share the exporter
+    configure_runtime(settings.METRICS_PROMETHEUS_BIND_ADDRESS, settings.METRICS_OTEL_ENDPOINT)
+
+    # payload codec included, see app/utils/temporal_client.py
+    client = await connect()
+
+    # sync activities run on a thread pool per role, one thread per activity slot
+    executors: List[ThreadPoolExecutor] = []
+    workers: List[Worker] = []
+    for role in args.roles:
+        executor = None
+        if role in ACTIVITY_ROLES:
+            executor = ThreadPoolExecutor(max_workers=role_concurrency(role), thread_name_prefix=role)
+            executors.append(executor)
+        workers.append(build_worker(client, role, executor))
+
+    if args.warm_cache and "lookups" in args.roles:
+        await asyncio.to_thread(data_api.warm_cache)
+        print("Directory cache warmed")
+
+    for role, worker in zip(args.roles, workers):
+        print(f"Worker role {role} started on task queue:", worker.task_queue)
+    try:
+        await asyncio.gather(*(worker.run() for worker in workers))
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=True)
+        # the shared Data API / SendGrid pools are opened lazily by the first activity using them
+        close_data_api_client()
+        close_sendgrid_client()
 
 
 if __name__ == "__main__":